@@ -4,21 +4,212 @@ This script creates a simple icon with "SG" letters in the app accent color
 on a black background using Pillow.
 """
 
+import functools
+import hashlib
+import importlib
 import io
 import os
+import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-try:
-    from PIL import Image, ImageDraw, ImageFont
-except ImportError:
-    print("Required package not installed. Installing...")
-    os.system(f"{sys.executable} -m pip install Pillow")
-    from PIL import Image, ImageDraw, ImageFont
+# Pillow modules, imported on first use by _import_pil()
+Image = ImageDraw = ImageFont = None
 
+# Text drawn on the icon and the font size it is measured at
+TEXT = "SG"
+REFERENCE_FONT_SIZE = 180
 
-def create_sg_icon():
-    """Create ICO file with SG letters design."""
+# Preferred bold system fonts on Windows, in order of preference
+WINDOWS_FONTS_DIR = "C:/Windows/Fonts"
+WINDOWS_FONT_NAMES = (
+    "arialbd.ttf",  # Arial Bold
+    "calibrib.ttf",  # Calibri Bold
+    "segoeuib.ttf",  # Segoe UI Bold
+)
+
+# Raw pixel buffers for solid backgrounds, keyed by (size, color)
+_BG_BUF_CACHE = {}
+
+
+def _import_pil(auto_install=False):
+    """Import Pillow on first use.
+
+    Args:
+        auto_install: If True, install Pillow with pip when it is missing.
+    """
+    global Image, ImageDraw, ImageFont
+    if Image is not None:
+        return
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+    except ImportError:
+        if not auto_install:
+            raise
+        print("Required package not installed. Installing...")
+        subprocess.check_call([
+            sys.executable, "-m", "pip", "install",
+            "--quiet", "--disable-pip-version-check", "Pillow>=9.2",
+        ])
+        importlib.invalidate_caches()
+        from PIL import Image, ImageDraw, ImageFont
+
+
+@functools.cache
+def _available_fonts(fonts_dir):
+    """Return the lowercase file names in fonts_dir, read with a single scan."""
+    try:
+        with os.scandir(fonts_dir) as entries:
+            return frozenset(entry.name.lower() for entry in entries)
+    except OSError:
+        return frozenset()
+
+
+def _resolve_font_path():
+    """Return the path of the first available bold font, or None."""
+    if sys.platform == "win32":
+        # Try system fonts (Windows)
+        available = _available_fonts(WINDOWS_FONTS_DIR)
+        return next(
+            (f"{WINDOWS_FONTS_DIR}/{name}" for name in WINDOWS_FONT_NAMES
+             if name.lower() in available),
+            None
+        )
+    # Linux/Mac - let Pillow search its font directories
+    return "arial.ttf"
+
+
+def _solid_image(size, color):
+    """Return a new RGB or RGBA image filled with color, reusing a cached pixel buffer.
+
+    The mode follows the number of channels in color.
+    """
+    key = (size, color)
+    buf = _BG_BUF_CACHE.get(key)
+    if buf is None:
+        buf = bytes(color) * (size * size)
+        _BG_BUF_CACHE[key] = buf
+    return Image.frombytes('RGBA' if len(color) == 4 else 'RGB', (size, size), buf)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_font(path, size):
+    """Load a TrueType font, reusing fonts already loaded in this process."""
+    return ImageFont.truetype(path, size)
+
+
+def _icon_signature(resolved_font_path, sizes, bg_color, accent_color, compress):
+    """Build a cache key for the icon inputs.
+
+    Returns:
+        Hex digest that changes whenever the rendered icon would change.
+    """
+    font_mtime = None
+    if resolved_font_path is not None and os.path.exists(resolved_font_path):
+        font_mtime = os.path.getmtime(resolved_font_path)
+    key = repr((
+        TEXT, REFERENCE_FONT_SIZE, accent_color, bg_color, tuple(sizes),
+        resolved_font_path, font_mtime, compress,
+    ))
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _measure_text(font):
+    """Return the (width, height) of the icon text in the given font."""
+    bbox = ImageDraw.Draw(Image.new('RGBA', (1, 1))).textbbox((0, 0), TEXT, font=font)
+    return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+
+def _measure_reference_text(resolved_font_path):
+    """Measure the icon text once at REFERENCE_FONT_SIZE.
+
+    This also serves as the check that the resolved font can be loaded.
+
+    Returns:
+        (width, height) of the text, or None if the font cannot be loaded.
+    """
+    if resolved_font_path is None:
+        return None
+    try:
+        ref_font = _load_font(resolved_font_path, REFERENCE_FONT_SIZE)
+    except (OSError, ValueError):
+        return None
+    return _measure_text(ref_font)
+
+
+def _plan_size(size, resolved_font_path, ref_text_size):
+    """Choose the font and text position for one directly rendered size.
+
+    Returns:
+        (size, font, x, y, anchor) tuple; font is None to use Pillow's default
+        font, anchor is None for the default top-left anchor.
+    """
+    # Calculate scale factor and font size
+    scale = size / 256.0
+    font_size = max(8, int(REFERENCE_FONT_SIZE * scale))  # Proportional font size
+    
+    # Try to use a bold font, fallback to default if not available
+    font = None
+    if ref_text_size is not None:
+        # For very small sizes (16x16), only keep the bold font if the text fits;
+        # otherwise the default font is clearer
+        text_width = int(ref_text_size[0] * font_size / REFERENCE_FONT_SIZE)
+        text_height = int(ref_text_size[1] * font_size / REFERENCE_FONT_SIZE)
+        if size > 16 or (text_width < size and text_height < size):
+            try:
+                font = _load_font(resolved_font_path, font_size)
+            except (OSError, ValueError):
+                font = None
+    
+    # Calculate text position (centered)
+    draw_font = font if font is not None else ImageFont.load_default()
+    if isinstance(draw_font, ImageFont.FreeTypeFont):
+        # Let FreeType center the text on the middle/middle anchor
+        x, y, anchor = size // 2, size // 2, "mm"
+    else:
+        # Bitmap fonts only support the top-left anchor, so center by hand
+        text_width, text_height = _measure_text(draw_font)
+        x, y, anchor = (size - text_width) // 2, (size - text_height) // 2, None
+    if size > 16:
+        y -= int(10 * scale)  # Slightly move up for better centering
+    return size, font, x, y, anchor
+
+
+def _render_planned(plan_entry, bg_color, accent_color):
+    """Draw the icon text for one planned size, or return None if it fails."""
+    size, font, x, y, anchor = plan_entry
+    try:
+        img = _solid_image(size, bg_color)
+        if font is None:
+            font = ImageFont.load_default()
+        ImageDraw.Draw(img).text((x, y), TEXT, fill=accent_color, font=font, anchor=anchor)
+        return img
+    except Exception as e:
+        print(f"  Warning: Failed to generate {size}x{size}: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def _scale_from_master(master, size, rendered):
+    """Produce one icon size, downsampling the master unless it was drawn directly."""
+    if size in rendered:
+        img = rendered[size]
+    else:
+        img = master.resize((size, size), Image.LANCZOS)
+    # The ICO writer expects RGBA; convert only at the end
+    return img.convert('RGBA') if img is not None else None
+
+
+def create_sg_icon(auto_install=False):
+    """Create ICO file with SG letters design.
+
+    Args:
+        auto_install: If True, install Pillow with pip when it is missing.
+    """
+    _import_pil(auto_install)
+    
     # Paths
     script_dir = Path(__file__).parent
     ico_path = script_dir / "assets" / "icon" / "app.ico"
@@ -32,99 +223,67 @@ def create_sg_icon():
     
     # Sizes for ICO file
     sizes = [16, 32, 48, 64, 256]
-    images = []
     
-    print(f"Creating SG icon: {ico_path}")
+    # Resolve the font file once; only the point size varies per image
+    resolved_font_path = _resolve_font_path()
     
-    for size in sizes:
-        print(f"  Generating {size}x{size}...")
-        try:
-            # Create image with black background
-            img = Image.new('RGBA', (size, size), bg_color)
-            draw = ImageDraw.Draw(img)
-            
-            # Calculate scale factor and font size
-            scale = size / 256.0
-            font_size = max(8, int(180 * scale))  # Proportional font size
-            
-            # Try to use a bold font, fallback to default if not available
-            try:
-                # Try system fonts (Windows)
-                if sys.platform == "win32":
-                    font_paths = [
-                        "C:/Windows/Fonts/arialbd.ttf",  # Arial Bold
-                        "C:/Windows/Fonts/calibrib.ttf",  # Calibri Bold
-                        "C:/Windows/Fonts/segoeuib.ttf",  # Segoe UI Bold
-                    ]
-                    font = None
-                    for font_path in font_paths:
-                        if os.path.exists(font_path):
-                            try:
-                                font = ImageFont.truetype(font_path, font_size)
-                                break
-                            except:
-                                continue
-                    if font is None:
-                        font = ImageFont.load_default()
-                else:
-                    # Linux/Mac - try common fonts
-                    try:
-                        font = ImageFont.truetype("arial.ttf", font_size)
-                    except:
-                        font = ImageFont.load_default()
-            except:
-                font = ImageFont.load_default()
-            
-            # Draw "SG" text
-            text = "SG"
-            
-            # Calculate text position (centered)
-            # Get text bounding box
-            if hasattr(draw, 'textbbox'):
-                bbox = draw.textbbox((0, 0), text, font=font)
-                text_width = bbox[2] - bbox[0]
-                text_height = bbox[3] - bbox[1]
-            else:
-                # Fallback for older PIL
-                bbox = draw.textsize(text, font=font)
-                text_width, text_height = bbox
-            
-            x = (size - text_width) // 2
-            y = (size - text_height) // 2 - int(10 * scale)  # Slightly move up for better centering
-            
-            # Draw text with accent color
-            draw.text((x, y), text, fill=accent_color, font=font)
-            
-            # For very small sizes (16x16), make it simpler
-            if size <= 16:
-                # Redraw with default font for clarity
-                img = Image.new('RGBA', (size, size), bg_color)
-                draw = ImageDraw.Draw(img)
-                font = ImageFont.load_default()
-                if hasattr(draw, 'textbbox'):
-                    bbox = draw.textbbox((0, 0), text, font=font)
-                    text_width = bbox[2] - bbox[0]
-                    text_height = bbox[3] - bbox[1]
-                else:
-                    bbox = draw.textsize(text, font=font)
-                    text_width, text_height = bbox
-                x = (size - text_width) // 2
-                y = (size - text_height) // 2
-                draw.text((x, y), text, fill=accent_color, font=font)
-            
-            images.append(img)
-        except Exception as e:
-            print(f"  Warning: Failed to generate {size}x{size}: {e}")
-            import traceback
-            traceback.print_exc()
+    # Skip regeneration if the existing icon was built from the same inputs
+    sig_path = ico_path.with_suffix('.sig')
+    compress = os.environ.get('ICO_COMPRESS') == '1'
+    signature = _icon_signature(resolved_font_path, sizes, bg_color, accent_color, compress)
+    if ico_path.exists() and sig_path.exists() and sig_path.read_text() == signature:
+        print(f"✓ ICO file is up to date: {ico_path}")
+        return True
+    
+    ref_text_size = _measure_reference_text(resolved_font_path)
+    
+    # Progress is collected and written once, rather than printed per size
+    log_lines = [f"Creating SG icon: {ico_path}"]
+    
+    # Rasterize the text once at full size; smaller sizes are downsampled from it,
+    # except the tiny ones where downsampled text is illegible
+    rendered_sizes = [max(sizes)] + [size for size in sizes if size <= 16]
+    plan = [_plan_size(size, resolved_font_path, ref_text_size) for size in rendered_sizes]
+    # Both colors are opaque, so draw and resample in RGB (3 bytes/pixel instead of 4)
+    bg_rgb, accent_rgb = bg_color[:3], accent_color[:3]
+    log_lines.extend(f"  Generating {size}x{size}..." for size in rendered_sizes)
+    rendered = {entry[0]: _render_planned(entry, bg_rgb, accent_rgb) for entry in plan}
+    master = rendered[max(sizes)]
+    if master is None:
+        log_lines.append("✗ Failed to create any icon sizes")
+        sys.stdout.write("\n".join(log_lines) + "\n")
+        return False
+    
+    # Sizes are independent, so scale them concurrently (Pillow releases the GIL)
+    log_lines.extend(
+        f"  Downsampling {size}x{size}..." for size in sizes if size not in rendered
+    )
+    with ThreadPoolExecutor(max_workers=min(len(sizes), os.cpu_count() or 1)) as executor:
+        futures = [
+            executor.submit(_scale_from_master, master, size, rendered)
+            for size in sizes
+        ]
+        images = [img for img in (future.result() for future in futures) if img is not None]
+    sys.stdout.write("\n".join(log_lines) + "\n")
     
     if images:
-        # Save as ICO
-        images[0].save(
-            str(ico_path),
+        # Save as ICO from the largest image so every size is kept; store
+        # uncompressed BMP entries unless PNG compression is requested
+        largest = max(images, key=lambda img: img.width)
+        buf = io.BytesIO()
+        largest.save(
+            buf,
             format='ICO',
-            sizes=[(img.width, img.height) for img in images]
+            sizes=[(img.width, img.height) for img in images],
+            append_images=[img for img in images if img is not largest],
+            bitmap_format='png' if compress else 'bmp'
         )
+        # Write the encoded icon in one go via a sibling temp file, so an
+        # interrupted run never leaves a truncated app.ico behind
+        tmp_path = ico_path.with_suffix('.ico.tmp')
+        tmp_path.write_bytes(buf.getvalue())
+        os.replace(tmp_path, ico_path)
+        sig_path.write_text(signature)
         print(f"✓ ICO file created: {ico_path}")
         print(f"  Sizes included: {[f'{img.width}x{img.height}' for img in images]}")
         return True
@@ -134,4 +293,4 @@ def create_sg_icon():
 
 
 if __name__ == "__main__":
-    create_sg_icon()
+    create_sg_icon(auto_install=True)
@@ -5,16 +5,26 @@ within a specified domain, generating a comprehensive sitemap for SEO and
 documentation purposes.
 """
 
+import codecs
+import hashlib
+import itertools
 import logging
 import os
+import re
 import sys
+import threading
 import time
-from typing import Set, List, Optional, Callable
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, FrozenSet, Set, List, Optional, Callable, Tuple
 from urllib.parse import urljoin, urlparse
 from urllib.robotparser import RobotFileParser
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+from lxml import etree
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QProgressBar, QTextEdit,
@@ -23,15 +33,43 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import QThread, pyqtSignal, Qt
 from PyQt6.QtGui import QClipboard
 
-from sitemap_generator import generate_sitemap_xml, urls_to_text
-from url_normalizer import normalize_for_visited, normalize_for_sitemap
+from sitemap_generator import find_sitemap_parts, urls_to_text, urls_to_text_stream, write_sitemap_files
+from url_normalizer import normalize_both
 
 # Configuration Constants
 DEFAULT_MAX_DEPTH: int = 5
 DEFAULT_MAX_URLS: int = 10000
 DEFAULT_TIMEOUT: int = 5
 DEFAULT_CRAWL_DELAY: float = 0.5  # Seconds between requests
+MAX_CRAWL_DELAY: float = 10.0  # Seconds; upper bound for a robots.txt Crawl-delay
+DEFAULT_MAX_WORKERS: int = 8  # Concurrent page fetches
+POOL_CONNECTIONS: int = 10  # Hosts with pooled keep-alive connections
+POOL_MAXSIZE: int = 50  # Keep-alive connections kept per host
+MAX_RETRIES: int = 2  # Retries for connection errors and transient status codes
+RETRY_BACKOFF_FACTOR: float = 0.3  # Seconds; doubled on each retry
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+MAX_RETRY_AFTER: float = DEFAULT_TIMEOUT  # Seconds; longer Retry-After waits are not retried
+ALLOWED_SCHEMES: FrozenSet[str] = frozenset({'http', 'https'})
+DEFAULT_PORTS: Dict[str, int] = {'http': 80, 'https': 443}
+# Links to these file types are never requested (a tuple, for str.endswith)
+SKIP_EXTENSIONS: Tuple[str, ...] = (
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.bmp',
+    '.zip', '.gz', '.tar', '.rar', '.7z', '.exe', '.dmg', '.msi',
+    '.mp3', '.mp4', '.avi', '.mov', '.webm', '.css', '.js',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot',
+    '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx'
+)
+# hrefs that never lead to another page: in-page anchors and non-HTTP links
+NON_PAGE_HREF_PREFIXES: Tuple[str, ...] = ('#', 'mailto:', 'javascript:', 'tel:')
+URL_BATCH_INTERVAL: float = 0.1  # Seconds between batched URL updates to the GUI
 USER_AGENT: str = 'SiteMapGeneratorBot/2.0 (+https://github.com/AlxManAi/free-sitemap-generator)'
+# Extensions fetched directly; any other extension is probed with HEAD first
+HTML_EXTENSIONS: Set[str] = {'.html', '.htm', '.xhtml', '.shtml', '.php', '.asp', '.aspx', '.jsp'}
+ENCODING_SNIFF_BYTES: int = 1024  # Body prefix searched for a <meta> charset
+PARSE_CHUNK_SIZE: int = 32768  # Bytes read from the socket per parser feed
+
+_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
 
 # Configure logging
 log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -56,9 +94,10 @@ class SiteMapGeneratorApp(QWidget):
         url_input: QLineEdit widget for URL entry.
         generate_button: QPushButton to start crawl process.
         progress_bar: QProgressBar showing crawl progress.
-        sitemap_urls: List of discovered URLs from the last crawl.
+        sitemap_urls: Sorted list of discovered URLs from the last crawl.
         crawl_start_time: Timestamp when crawl started.
         max_depth_reached: Maximum depth actually reached during crawl.
+        url_count: Number of URLs reported so far by the running crawl.
     """
 
     def __init__(self) -> None:
@@ -68,6 +107,7 @@ class SiteMapGeneratorApp(QWidget):
         self.sitemap_urls: List[str] = []
         self.crawl_start_time: float = 0.0
         self.max_depth_reached: int = 0
+        self.url_count: int = 0
         self.start_url: str = ""
         self.initUI()
         self.load_theme()
@@ -224,7 +264,7 @@ class SiteMapGeneratorApp(QWidget):
         url_text = self.url_input.text().strip()
         parsed_url = urlparse(url_text)
 
-        if not parsed_url.scheme or parsed_url.scheme not in ['http', 'https'] or not parsed_url.netloc:
+        if not parsed_url.scheme or parsed_url.scheme not in ALLOWED_SCHEMES or not parsed_url.netloc:
             QMessageBox.warning(
                 self,
                 "Invalid URL",
@@ -266,6 +306,7 @@ class SiteMapGeneratorApp(QWidget):
         self.stats_text_area.clear()
         self.crawl_start_time = time.time()
         self.max_depth_reached = 0
+        self.url_count = 0
 
         # Update UI
         self.log_text_area.append(f"Starting crawl for: {url}")
@@ -286,19 +327,15 @@ class SiteMapGeneratorApp(QWidget):
         self.thread.error_signal.connect(self.handle_crawl_error)
         self.thread.start()
 
-    def append_url_to_results(self, url_str: str) -> None:
-        """Append a discovered URL to the results text area.
+    def append_url_to_results(self, urls: List[str]) -> None:
+        """Append a batch of discovered URLs to the results text area.
 
         Args:
-            url_str: The URL to append to results.
+            urls: The URLs to append to results.
         """
-        self.log_text_area.append(url_str)
-        # Count URLs from log (more reliable than tracking separately)
-        # Simple approach: count lines that look like URLs
-        text = self.log_text_area.toPlainText()
-        url_count = sum(1 for line in text.split('\n') 
-                       if line.strip() and (line.startswith('http://') or line.startswith('https://')))
-        self.progress_label.setText(f"Found {url_count} URLs...")
+        self.log_text_area.append('\n'.join(urls))
+        self.url_count += len(urls)
+        self.progress_label.setText(f"Found {self.url_count} URLs...")
 
     def crawl_is_finished(self, sitemap_list: List[str]) -> None:
         """Handle completion of the crawl process.
@@ -306,7 +343,8 @@ class SiteMapGeneratorApp(QWidget):
         Args:
             sitemap_list: List of discovered URLs from the crawl.
         """
-        self.sitemap_urls = sitemap_list
+        # Sort once here; every export reuses the sorted list
+        self.sitemap_urls = sorted(sitemap_list)
         # Update progress label with final count
         self.progress_label.setText(f"Found {len(sitemap_list)} URLs")
         elapsed_time = time.time() - self.crawl_start_time
@@ -360,7 +398,9 @@ class SiteMapGeneratorApp(QWidget):
             crawler_stats.get('filtered_by_exclude', 0) +
             crawler_stats.get('filtered_by_tracking', 0) +
             crawler_stats.get('filtered_by_depth', 0) +
-            crawler_stats.get('non_200_status', 0)
+            crawler_stats.get('filtered_by_content_type', 0) +
+            crawler_stats.get('non_200_status', 0) +
+            crawler_stats.get('fetch_errors', 0)
         )
         
         stats_text = f"""<h3>Crawl Statistics</h3>
@@ -376,7 +416,9 @@ class SiteMapGeneratorApp(QWidget):
 <p><b>Filtered by Exclude:</b> {crawler_stats.get('filtered_by_exclude', 0)}</p>
 <p><b>Filtered by Tracking Params:</b> {crawler_stats.get('filtered_by_tracking', 0)}</p>
 <p><b>Filtered by Max Depth:</b> {crawler_stats.get('filtered_by_depth', 0)}</p>
+<p><b>Non-HTML Content:</b> {crawler_stats.get('filtered_by_content_type', 0)}</p>
 <p><b>Non-200 Status Codes:</b> {crawler_stats.get('non_200_status', 0)}</p>
+<p><b>Fetch Errors:</b> {crawler_stats.get('fetch_errors', 0)}</p>
 <p><b>Total Filtered:</b> {filtered_total}</p>
 """
         self.stats_text_area.setHtml(stats_text)
@@ -417,7 +459,7 @@ class SiteMapGeneratorApp(QWidget):
         """Stop the current crawling process."""
         if self.thread is not None and self.thread.isRunning():
             if hasattr(self.thread, 'crawler') and self.thread.crawler:
-                self.thread.crawler.should_stop = True
+                self.thread.crawler.stop()
             self.log_text_area.append("\n--- Stopping crawl (please wait) ---")
             self.progress_label.setText("Stopping...")
             logger.info("User requested crawl stop")
@@ -432,16 +474,43 @@ class SiteMapGeneratorApp(QWidget):
             self,
             "Save Sitemap XML",
             "sitemap.xml",
-            "XML Files (*.xml);;All Files (*)"
+            "XML Files (*.xml);;Gzipped XML Files (*.xml.gz);;All Files (*)"
         )
 
         if file_path:
             try:
-                xml_content = generate_sitemap_xml(self.sitemap_urls)
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(xml_content)
-                QMessageBox.information(self, "Success", f"Sitemap saved to:\n{file_path}")
-                logger.info(f"Sitemap XML saved to {file_path}")
+                # Large sitemaps are split into parts listed by a sitemap index,
+                # with part locations relative to the crawled site's root
+                parsed_start = urlparse(self.start_url)
+                written = write_sitemap_files(
+                    self.sitemap_urls,
+                    file_path,
+                    f"{parsed_start.scheme}://{parsed_start.netloc}/",
+                    presorted=True
+                )
+                if len(written) > 1:
+                    message = (
+                        f"Sitemap index saved to:\n{file_path}\n\n"
+                        f"with {len(written) - 1} sitemap files in the same folder:\n"
+                        + "\n".join(os.path.basename(path) for path in written[1:])
+                    )
+                else:
+                    message = f"Sitemap saved to:\n{file_path}"
+                # Part files from an earlier, larger export are not part of
+                # this sitemap but would still be served next to it
+                written_names = set(written)
+                stale = [path for path in find_sitemap_parts(file_path) if path not in written_names]
+                if stale:
+                    message += (
+                        "\n\nThese files in the same folder are left over from an "
+                        "earlier export and are not part of this sitemap:\n"
+                        + "\n".join(os.path.basename(path) for path in stale)
+                    )
+                    QMessageBox.warning(self, "Success", message)
+                    logger.warning(f"Stale sitemap files next to {file_path}: {', '.join(stale)}")
+                else:
+                    QMessageBox.information(self, "Success", message)
+                logger.info(f"Sitemap XML saved to {', '.join(written)}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to save sitemap:\n{str(e)}")
                 logger.error(f"Failed to save sitemap: {e}")
@@ -461,9 +530,8 @@ class SiteMapGeneratorApp(QWidget):
 
         if file_path:
             try:
-                text_content = urls_to_text(self.sitemap_urls)
                 with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(text_content)
+                    urls_to_text_stream(self.sitemap_urls, f, presorted=True)
                 QMessageBox.information(self, "Success", f"URLs list saved to:\n{file_path}")
                 logger.info(f"URLs list saved to {file_path}")
             except Exception as e:
@@ -477,7 +545,7 @@ class SiteMapGeneratorApp(QWidget):
             return
 
         try:
-            text_content = urls_to_text(self.sitemap_urls)
+            text_content = urls_to_text(self.sitemap_urls, presorted=True)
             clipboard = QApplication.clipboard()
             clipboard.setText(text_content)
             QMessageBox.information(self, "Success", f"Copied {len(self.sitemap_urls)} URLs to clipboard.")
@@ -486,25 +554,74 @@ class SiteMapGeneratorApp(QWidget):
             QMessageBox.critical(self, "Error", f"Failed to copy to clipboard:\n{str(e)}")
             logger.error(f"Failed to copy to clipboard: {e}")
 
+class _PoliteRetry(Retry):
+    """urllib3 Retry that gives up instead of retrying early against a long Retry-After.
+
+    A Retry-After of up to MAX_RETRY_AFTER seconds is waited out and the
+    request retried as usual. A longer one ends the retries and returns the
+    response as-is, so the server is neither hit again before the time it
+    asked for nor allowed to stall a worker thread (and a user's stop request)
+    for an arbitrary time.
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        """Count a retry, refusing it when the server asks to wait longer than MAX_RETRY_AFTER."""
+        if response is not None and response.status in self.RETRY_AFTER_STATUS_CODES:
+            retry_after = self.get_retry_after(response)
+            if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+                raise MaxRetryError(_pool, url, ResponseError(
+                    f"Retry-After of {retry_after:g}s exceeds the {MAX_RETRY_AFTER:g}s limit"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+class _LinkCollector:
+    """lxml parser target that records the href of every <a> start tag.
+
+    Used with etree.HTMLParser(target=...), so the parser emits tag events
+    only and no element tree is built for the page.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty link list."""
+        self.links: List[str] = []
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        """Record the href of an <a> start tag."""
+        if tag == 'a':
+            href = attrib.get('href')
+            if href is not None:
+                self.links.append(href)
+
+    def close(self) -> List[str]:
+        """Return the collected links once the document is parsed.
+
+        Repeated hrefs (navigation, footers) are dropped, keeping first-seen order.
+        """
+        return list(dict.fromkeys(self.links))
+
+
 class Crawler:
-    """Recursive web crawler for generating sitemaps.
+    """Breadth-first web crawler for generating sitemaps.
 
     Crawls a website starting from a base URL, discovering all pages
-    within the same domain up to a specified depth.
+    within the same domain up to a specified depth. Pages of each depth
+    level are fetched concurrently by a pool of worker threads.
 
     Attributes:
         base_url: The starting URL for the crawl.
         domain: The domain (netloc) extracted from base_url.
-        max_depth: Maximum recursion depth for crawling.
+        max_depth: Maximum link depth for crawling.
         max_urls: Maximum number of URLs to collect (0 = unlimited).
         exclude_substrings: List of substrings to exclude from crawling.
         strip_tracking: Whether to strip tracking parameters from URLs.
-        visited_urls: Set of normalized URLs already crawled.
-        sitemap: Set of discovered URLs (final results).
+        visited_urls: Set of 64-bit hashes of the normalized URLs already crawled.
+        sitemap: Discovered URLs (final results) as dict keys, in discovery order.
         url_callback: Optional callback function for real-time URL reporting.
+        progress_callback: Optional callback run after each page fetch completes.
         crawl_delay: Delay in seconds between requests (rate limiting).
         robot_parser: Optional RobotFileParser for robots.txt compliance.
         respect_robots_txt: Whether to check robots.txt rules.
+        max_workers: Number of pages fetched concurrently.
         should_stop: Flag to indicate if crawling should stop (e.g., max_urls reached).
         stats: Dictionary with crawl statistics.
     """
@@ -517,59 +634,121 @@ class Crawler:
         exclude_substrings: Optional[List[str]] = None,
         strip_tracking: bool = True,
         crawl_delay: float = DEFAULT_CRAWL_DELAY,
-        respect_robots_txt: bool = False
+        respect_robots_txt: bool = False,
+        max_workers: int = DEFAULT_MAX_WORKERS
     ) -> None:
         """Initialize the crawler.
 
         Args:
             base_url: Starting URL for crawl.
-            max_depth: Maximum depth for recursive crawling (default: 5).
+            max_depth: Maximum link depth for crawling (default: 5).
             max_urls: Maximum number of URLs to collect, 0 = unlimited (default: 0).
             exclude_substrings: List of substrings to exclude from URLs (default: None).
             strip_tracking: Whether to strip tracking parameters (default: True).
             crawl_delay: Delay between requests in seconds (default: 0.5).
             respect_robots_txt: Whether to respect robots.txt (default: False).
+            max_workers: Number of pages fetched concurrently (default: 8).
         """
         # Normalize base URL
-        parsed_base = urlparse(base_url)
+        # Parsed once; link filtering reuses these parts instead of re-parsing
+        self._parsed_base = urlparse(base_url)
         self.base_url = base_url
-        self.domain = parsed_base.netloc.lower()  # Store normalized domain
+        self.domain = self._parsed_base.netloc.lower()  # Store normalized domain
+        self._domain_canon = self.domain.removeprefix('www.')  # www and bare host are the same site
         self.max_depth = max_depth
         self.max_urls = max_urls
         self.exclude_substrings = exclude_substrings or []
+        # One alternation pattern checks every exclude substring in a single scan
+        self._exclude_re: Optional[re.Pattern[str]] = (
+            re.compile('|'.join(re.escape(substring) for substring in self.exclude_substrings))
+            if self.exclude_substrings else None
+        )
         self.strip_tracking = strip_tracking
-        self.visited_urls: Set[str] = set()
-        self.sitemap: Set[str] = set()
+        self.visited_urls: Set[int] = set()
+        self.sitemap: Dict[str, None] = {}  # Ordered set: dict keys, values unused
         self.url_callback: Optional[Callable[[str], None]] = None
+        self.progress_callback: Optional[Callable[[], None]] = None
         self.crawl_delay = crawl_delay
         self.respect_robots_txt = respect_robots_txt
         self.robot_parser: Optional[RobotFileParser] = None
-        self.should_stop = False
-        # Create session for connection reuse
+        # robots.txt decisions per URL; links to the same page repeat across a site
+        self._robots_decisions: Dict[str, bool] = {}
+        self.max_workers = max(1, max_workers)
+        # Backs should_stop, so workers waiting for a request slot wake on stop
+        self._stop_event = threading.Event()
+        # Worker threads share stats and request pacing
+        self._stats_lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._next_allowed_per_host: Dict[str, float] = {}
+        # Create session for connection reuse; the pool must hold a kept-alive
+        # connection for every worker, or connections get discarded and reopened.
+        # Connection errors and transient statuses are retried with backoff by
+        # urllib3; the final response is returned so raise_for_status() sees it.
         self.session = requests.Session()
         self.session.headers.update({'User-Agent': USER_AGENT})
+        retry = _PoliteRetry(
+            total=MAX_RETRIES,
+            backoff_factor=RETRY_BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUS_CODES,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=max(POOL_MAXSIZE, self.max_workers),
+            max_retries=retry
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.stats = {
             'filtered_by_exclude': 0,
             'filtered_by_tracking': 0,
             'filtered_by_depth': 0,
             'filtered_by_max_urls': 0,
-            'non_200_status': 0
+            'filtered_by_content_type': 0,
+            'non_200_status': 0,
+            'fetch_errors': 0
         }
 
         if self.respect_robots_txt:
             self._init_robot_parser()
 
     def _init_robot_parser(self) -> None:
-        """Initialize robots.txt parser for the domain."""
+        """Fetch and parse robots.txt for the domain through the crawler session.
+
+        A Crawl-delay for our user agent raises crawl_delay if it is longer,
+        up to MAX_CRAWL_DELAY.
+        """
         try:
             self.robot_parser = RobotFileParser()
-            robots_url = f"{urlparse(self.base_url).scheme}://{self.domain}/robots.txt"
+            robots_url = f"{self._parsed_base.scheme}://{self.domain}/robots.txt"
             self.robot_parser.set_url(robots_url)
-            self.robot_parser.read()
+            response = self.session.get(robots_url, timeout=DEFAULT_TIMEOUT)
+            # Same status handling as RobotFileParser.read()
+            if response.status_code in (401, 403):
+                self.robot_parser.disallow_all = True
+            elif 400 <= response.status_code < 500:
+                self.robot_parser.allow_all = True
+            else:
+                response.raise_for_status()
+                self.robot_parser.parse(response.text.splitlines())
             logger.info(f"Loaded robots.txt from {robots_url}")
         except Exception as e:
             logger.warning(f"Failed to load robots.txt: {e}. Proceeding without robots.txt compliance.")
             self.robot_parser = None
+            return
+
+        robots_delay = self.robot_parser.crawl_delay(USER_AGENT)
+        if robots_delay is not None and float(robots_delay) > self.crawl_delay:
+            robots_delay = float(robots_delay)
+            if robots_delay > MAX_CRAWL_DELAY:
+                # A huge delay would make the crawl (and stopping it) look frozen
+                logger.warning(
+                    f"robots.txt Crawl-delay of {robots_delay:g}s is capped at {MAX_CRAWL_DELAY:g}s"
+                )
+                robots_delay = MAX_CRAWL_DELAY
+            else:
+                logger.info(f"Using Crawl-delay of {robots_delay:g}s from robots.txt")
+            self.crawl_delay = max(self.crawl_delay, robots_delay)
 
     def _can_fetch(self, url: str) -> bool:
         """Check if URL can be fetched according to robots.txt.
@@ -582,7 +761,11 @@ class Crawler:
         """
         if not self.respect_robots_txt or self.robot_parser is None:
             return True
-        return self.robot_parser.can_fetch(USER_AGENT, url)
+        allowed = self._robots_decisions.get(url)
+        if allowed is None:
+            allowed = self.robot_parser.can_fetch(USER_AGENT, url)
+            self._robots_decisions[url] = allowed
+        return allowed
 
     def _should_exclude_url(self, url: str) -> bool:
         """Check if URL should be excluded based on exclude_substrings.
@@ -593,179 +776,438 @@ class Crawler:
         Returns:
             True if URL should be excluded, False otherwise.
         """
-        if not self.exclude_substrings:
-            return False
-        return any(substring in url for substring in self.exclude_substrings)
+        return self._exclude_re is not None and self._exclude_re.search(url) is not None
 
-    def crawl(self, url: str, current_depth: int) -> None:
-        """Recursively crawl a URL and discover linked pages.
+    @staticmethod
+    def _rate_limit_key(url: str) -> str:
+        """Return the host a request is paced under.
+
+        www and bare hosts are crawled as one site, and an explicit default
+        port names the same server, so both collapse to one key.
 
         Args:
-            url: URL to crawl.
-            current_depth: Current depth in the crawl tree.
+            url: URL about to be requested.
+
+        Returns:
+            Lowercase host without www., with the port only if non-default.
         """
-        # Check if we should stop (max_urls reached)
-        if self.should_stop:
-            return
+        parsed = urlparse(url)
+        host = (parsed.hostname or '').removeprefix('www.')
+        try:
+            port = parsed.port
+        except ValueError:
+            port = None  # Malformed port; the request itself will fail
+        if port is not None and port != DEFAULT_PORTS.get(parsed.scheme):
+            host = f"{host}:{port}"
+        return host
+
+    @property
+    def should_stop(self) -> bool:
+        """Whether the crawl has been asked to stop."""
+        return self._stop_event.is_set()
+
+    @should_stop.setter
+    def should_stop(self, value: bool) -> None:
+        if value:
+            self._stop_event.set()
+        else:
+            self._stop_event.clear()
 
-        # Normalize URL for visited check
-        normalized_for_visited = normalize_for_visited(url, strip_tracking=self.strip_tracking)
-        
-        if normalized_for_visited in self.visited_urls or current_depth > self.max_depth:
-            if current_depth > self.max_depth:
-                self.stats['filtered_by_depth'] += 1
-            return
+    def stop(self) -> None:
+        """Ask the crawl to stop; workers waiting for a request slot give up at once."""
+        self.should_stop = True
 
-        # Check exclude filter (before normalization to catch all variants)
-        if self._should_exclude_url(url):
-            self.stats['filtered_by_exclude'] += 1
-            logger.debug(f"Skipping {url} (matches exclude filter)")
-            return
+    def _wait_for_request_slot(self, url: str) -> bool:
+        """Space request starts to the same host at least crawl_delay apart.
 
-        # Check robots.txt compliance
-        if not self._can_fetch(url):
-            logger.info(f"Skipping {url} (disallowed by robots.txt)")
-            return
+        Each caller reserves the next free start time for its host under the
+        lock and waits until then outside it, so waiting workers never block
+        each other or other hosts. The wait ends early if the crawl is stopped.
 
-        self.visited_urls.add(normalized_for_visited)
+        Args:
+            url: URL about to be requested.
 
-        # Check max_urls limit before making request
-        if self.max_urls > 0 and len(self.sitemap) >= self.max_urls:
-            self.should_stop = True
-            logger.info(f"Reached max_urls limit ({self.max_urls}). Stopping crawl.")
-            return
+        Returns:
+            True if the request may be sent, False if the crawl was stopped.
+        """
+        if self.crawl_delay <= 0:
+            return not self.should_stop
+        host = self._rate_limit_key(url)
+        with self._rate_lock:
+            now = time.monotonic()
+            start_time = max(now, self._next_allowed_per_host.get(host, 0.0))
+            self._next_allowed_per_host[host] = start_time + self.crawl_delay
+        if start_time > now:
+            return not self._stop_event.wait(start_time - now)
+        return not self.should_stop
+
+    @staticmethod
+    def _detect_encoding(content_type: str, head: bytes) -> str:
+        """Determine the character encoding of a response body without decoding it.
+
+        Uses the charset from the Content-Type header, then a <meta> charset
+        in the first ENCODING_SNIFF_BYTES of the body; labels that do not name
+        a known codec are ignored. The declared label is returned as-is, since
+        lxml expects IANA names ('euc-kr') rather than Python codec names
+        ('euc_kr').
 
-        # Rate limiting - delay between requests
-        if self.crawl_delay > 0 and len(self.visited_urls) > 1:
-            time.sleep(self.crawl_delay)
+        Args:
+            content_type: Content-Type header of the response.
+            head: First bytes of the body.
 
-        # Retry logic for temporary errors
-        max_retries = 3
-        retry_delay = 1.0  # Start with 1 second
-        
-        for attempt in range(max_retries):
-            try:
-                response = self.session.get(url, timeout=DEFAULT_TIMEOUT)
-                response.encoding = response.apparent_encoding  # Auto-detect encoding
-                response.raise_for_status()
-                break  # Success, exit retry loop
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
-                if attempt < max_retries - 1:
-                    wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
-                    logger.info(f"Retry {attempt + 1}/{max_retries} for {url} after {wait_time:.1f}s")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    # Last attempt failed
-                    logger.warning(f"Failed to fetch {url} after {max_retries} attempts: {e}")
-                    return
-            except requests.exceptions.HTTPError as e:
-                # Don't retry HTTP errors (4xx, 5xx), but log them
-                status_code = e.response.status_code
-                error_message = f"HTTP {status_code} - {e.response.reason}"
-                if status_code == 403:
-                    error_message += " (Access forbidden)"
-                elif status_code == 404:
-                    error_message += " (Page not found)"
-                elif 400 <= status_code < 500:
-                    error_message += " (Client error)"
-                elif 500 <= status_code < 600:
-                    error_message += " (Server error)"
-                logger.warning(f"Error fetching {url}: {error_message}")
-                self.stats['non_200_status'] += 1
-                return
-        
-        # Check if we got a response (should always be true after successful retry loop)
-        if 'response' not in locals():
-            return  # Failed all retries
-        
-        # Explicitly check for status code 200
-        if response.status_code != 200:
-            self.stats['non_200_status'] += 1
-            logger.warning(f"Skipping {url} (status code: {response.status_code})")
-            return
+        Returns:
+            Encoding label, 'utf-8' if none is declared.
+        """
+        header_match = _CHARSET_RE.search(content_type)
+        meta_match = _META_CHARSET_RE.search(head[:ENCODING_SNIFF_BYTES])
+        labels = (
+            header_match.group(1) if header_match else None,
+            meta_match.group(1).decode('ascii') if meta_match else None,
+        )
+        for label in labels:
+            if label:
+                label = label.strip()
+                try:
+                    codecs.lookup(label)
+                except LookupError:
+                    continue  # Unknown charset label
+                return label
+        return 'utf-8'
+
+    @staticmethod
+    def _url_key(normalized_url: str) -> int:
+        """Return the compact hash stored in visited_urls for a normalized URL.
+
+        A 64-bit key keeps collisions negligible for any realistic crawl size
+        while storing each entry as a small int instead of a string.
+
+        Args:
+            normalized_url: Visited form of the URL as returned by normalize_both.
+
+        Returns:
+            64-bit BLAKE2b hash of the URL as an int.
+        """
+        digest = hashlib.blake2b(normalized_url.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
 
-        # Check if the response content is HTML
+    def _is_probably_html(self, url: str) -> bool:
+        """Check with a HEAD request whether a URL with a non-HTML extension serves HTML.
+
+        URLs without an extension or with an HTML-like one are assumed to be
+        HTML, so only links such as /file.pdf pay for the extra request. If the
+        HEAD request fails or is not supported, the GET decides instead.
+
+        Args:
+            url: URL to check.
+
+        Returns:
+            False only if the server reports a non-HTML Content-Type.
+        """
+        last_segment = urlparse(url).path.rsplit('/', 1)[-1]
+        extension = os.path.splitext(last_segment)[1].lower()
+        if not extension or extension in HTML_EXTENSIONS:
+            return True
+        # The probe is a request of its own and takes its own slot
+        if not self._wait_for_request_slot(url):
+            return True  # Stopped; the caller checks should_stop before its GET
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=DEFAULT_TIMEOUT)
+        except requests.exceptions.RequestException:
+            return True
         content_type = response.headers.get('Content-Type', '')
-        if 'text/html' not in content_type:
-            logger.debug(f"Skipping non-HTML content at {url} (Content-Type: {content_type})")
-            return
+        if response.status_code != 200 or not content_type:
+            return True
+        return 'text/html' in content_type
 
-        # Check max_urls limit after successful fetch
-        if self.max_urls > 0 and len(self.sitemap) >= self.max_urls:
-            self.should_stop = True
-            self.stats['filtered_by_max_urls'] += 1
-            logger.info(f"Reached max_urls limit ({self.max_urls}). Stopping crawl.")
-            return
+    def _fetch_and_parse(self, url: str) -> Optional[List[str]]:
+        """Fetch a page and extract the raw href values of its links.
 
-        # Normalize URL for sitemap (preserves trailing slash, removes tracking params if enabled)
-        normalized_for_sitemap = normalize_for_sitemap(url, strip_tracking=self.strip_tracking)
-        self.sitemap.add(normalized_for_sitemap)
-        if self.url_callback:
-            self.url_callback(normalized_for_sitemap)
-        logger.debug(f"Crawled (depth {current_depth}): {normalized_for_sitemap}")
+        Runs in a worker thread, so it only touches shared state under a lock.
 
-        # Stop if max_urls reached
+        Args:
+            url: URL to fetch.
+
+        Returns:
+            List of distinct href values, or None if the page was not fetched or is not HTML.
+        """
         if self.should_stop:
-            return
+            return None
+
+        # Skip binary files before downloading their body (the HEAD probe
+        # waits for its own request slot)
+        if not self._is_probably_html(url):
+            with self._stats_lock:
+                self.stats['filtered_by_content_type'] += 1
+            logger.debug(f"Skipping non-HTML content at {url} (HEAD check)")
+            return None
+
+        # Rate limiting - delay between requests
+        if self.should_stop or not self._wait_for_request_slot(url):
+            return None
+
+        # Transient errors were already retried by the session's adapter.
+        # The body is streamed, so only headers are read until it is needed.
+        try:
+            response = self.session.get(url, timeout=DEFAULT_TIMEOUT, stream=True)
+            response.raise_for_status()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            logger.warning(f"Failed to fetch {url} after {MAX_RETRIES} retries: {e}")
+            with self._stats_lock:
+                self.stats['fetch_errors'] += 1
+            return None
+        except requests.exceptions.HTTPError as e:
+            # Log HTTP errors (4xx, 5xx) that persisted after retries
+            status_code = e.response.status_code
+            error_message = f"HTTP {status_code} - {e.response.reason}"
+            if status_code == 403:
+                error_message += " (Access forbidden)"
+            elif status_code == 404:
+                error_message += " (Page not found)"
+            elif 400 <= status_code < 500:
+                error_message += " (Client error)"
+            elif 500 <= status_code < 600:
+                error_message += " (Server error)"
+            logger.warning(f"Error fetching {url}: {error_message}")
+            with self._stats_lock:
+                self.stats['non_200_status'] += 1
+            e.response.close()
+            return None
+        
+        # Closing releases the connection without downloading a skipped body
+        try:
+            # Explicitly check for status code 200
+            if response.status_code != 200:
+                with self._stats_lock:
+                    self.stats['non_200_status'] += 1
+                logger.warning(f"Skipping {url} (status code: {response.status_code})")
+                return None
+
+            # Check if the response content is HTML
+            content_type = response.headers.get('Content-Type', '')
+            if 'text/html' not in content_type:
+                with self._stats_lock:
+                    self.stats['filtered_by_content_type'] += 1
+                logger.debug(f"Skipping non-HTML content at {url} (Content-Type: {content_type})")
+                return None
+
+            # Feed the body to lxml's C tokenizer chunk by chunk as it arrives and
+            # keep only <a href> values; the page is never held in memory whole,
+            # decoded to a Python str or built into a tree
+            try:
+                chunks = response.iter_content(chunk_size=PARSE_CHUNK_SIZE)
+                first_chunk = next(chunks, b'')
+                encoding = self._detect_encoding(content_type, first_chunk)
+                try:
+                    parser = etree.HTMLParser(target=_LinkCollector(), encoding=encoding)
+                except LookupError:
+                    # A label Python knows but libxml2 does not; let libxml2 detect it
+                    logger.debug(f"Unsupported encoding {encoding!r} for {url}, detecting from content")
+                    parser = etree.HTMLParser(target=_LinkCollector())
+                parser.feed(first_chunk)
+                for chunk in chunks:
+                    parser.feed(chunk)
+                return parser.close()
+            except requests.exceptions.RequestException as e:
+                # Timeouts and resets while reading the body are not retried
+                logger.warning(f"Failed to read {url}: {e}")
+                with self._stats_lock:
+                    self.stats['fetch_errors'] += 1
+                return None
+        finally:
+            response.close()
+
+    def _collect_links(self, url: str, hrefs: List[str], current_depth: int) -> List[Tuple[str, str]]:
+        """Filter a page's links down to new same-domain URLs for the next level.
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+        Args:
+            url: URL of the page the links were found on.
+            hrefs: Raw href values extracted from the page.
+            current_depth: Depth of the page the links were found on.
 
-        for link in soup.find_all('a', href=True):
+        Returns:
+            (absolute URL, sitemap form) pairs to crawl at current_depth + 1,
+            marked as visited.
+        """
+        next_urls: List[Tuple[str, str]] = []
+        # Root-relative links only need the page's scheme and host prepended
+        parsed_page = urlparse(url)
+        page_origin = f"{parsed_page.scheme}://{parsed_page.netloc}"
+        # Loop-invariant attributes as locals (should_stop can change mid-loop)
+        domain_canon = self._domain_canon
+        strip_tracking = self.strip_tracking
+        stats = self.stats
+        visited_urls = self.visited_urls
+        for href in hrefs:
             # Stop if max_urls reached
             if self.should_stop:
                 break
-                
-            href = link['href']
 
-            # Resolve relative URLs
-            absolute_url = urljoin(url, href)
-            parsed_absolute_url = urlparse(absolute_url)
+            # Resolve relative URLs; the common absolute and root-relative
+            # forms are handled without urljoin (dot segments still go through
+            # it, as do tabs and newlines, which urljoin strips)
+            if href.startswith(NON_PAGE_HREF_PREFIXES):
+                continue
+            try:
+                if '\n' in href or '\t' in href or '\r' in href:
+                    absolute_url = urljoin(url, href)
+                elif href.startswith(('http://', 'https://')):
+                    absolute_url = href
+                elif href.startswith('/') and not href.startswith('//') and '/.' not in href:
+                    absolute_url = page_origin + href
+                else:
+                    absolute_url = urljoin(url, href)
+                parsed_absolute_url = urlparse(absolute_url)
+            except ValueError:
+                # Malformed link such as 'http://[oops/'; skip it, not the crawl
+                logger.debug(f"Skipping malformed link {href!r} on {url}")
+                continue
 
             # Basic validation
-            if parsed_absolute_url.scheme not in ['http', 'https']:
+            if parsed_absolute_url.scheme not in ALLOWED_SCHEMES:
                 continue
 
-            # Normalize netloc for comparison (lowercase, optionally remove www)
-            netloc_normalized = parsed_absolute_url.netloc.lower()
-            if netloc_normalized.startswith('www.') and self.domain.startswith('www.'):
-                # Both have www, compare as is
-                pass
-            elif netloc_normalized.startswith('www.'):
-                netloc_normalized = netloc_normalized[4:]
-            
-            domain_for_comparison = self.domain
-            if domain_for_comparison.startswith('www.'):
-                domain_for_comparison = domain_for_comparison[4:]
-            
-            if netloc_normalized != domain_for_comparison:
+            # Same site: compare lowercase hosts with any www. prefix removed
+            if parsed_absolute_url.netloc.lower().removeprefix('www.') != domain_canon:
+                continue
+
+            # Known binary and asset files are dropped without any request.
+            # They are recorded as visited, so an asset linked from every
+            # page (a logo, a PDF in the footer) is counted only once
+            if parsed_absolute_url.path.lower().endswith(SKIP_EXTENSIONS):
+                skipped_key = self._url_key(
+                    normalize_both(parsed_absolute_url, strip_tracking=strip_tracking)[0]
+                )
+                if skipped_key not in visited_urls:
+                    visited_urls.add(skipped_key)
+                    with self._stats_lock:  # Also counted by fetch workers
+                        stats['filtered_by_content_type'] += 1
                 continue
 
             # Check exclude filter for discovered links (before normalization)
             if self._should_exclude_url(absolute_url):
-                self.stats['filtered_by_exclude'] += 1
+                stats['filtered_by_exclude'] += 1
                 continue
 
-            # Normalize URL for visited check
-            normalized_for_visited = normalize_for_visited(absolute_url, strip_tracking=self.strip_tracking)
+            # Normalize URL for visited check, reusing the parse from above
+            normalized_for_visited, normalized_for_sitemap = normalize_both(
+                parsed_absolute_url, strip_tracking=strip_tracking
+            )
             
             # Check if tracking params were stripped (for statistics)
-            if self.strip_tracking and absolute_url != normalized_for_visited:
-                self.stats['filtered_by_tracking'] += 1
+            if strip_tracking and absolute_url != normalized_for_visited:
+                stats['filtered_by_tracking'] += 1
+
+            visited_key = self._url_key(normalized_for_visited)
+            if visited_key in visited_urls:
+                continue
+
+            if current_depth + 1 > self.max_depth:
+                stats['filtered_by_depth'] += 1
+                continue
+
+            # Check robots.txt compliance
+            if not self._can_fetch(absolute_url):
+                logger.info(f"Skipping {absolute_url} (disallowed by robots.txt)")
+                continue
+
+            # Use original absolute_url for crawling (to preserve original URL structure)
+            # but normalized_for_visited is used for deduplication
+            visited_urls.add(visited_key)
+            next_urls.append((absolute_url, normalized_for_sitemap))
+        return next_urls
+
+    def crawl(self) -> None:
+        """Crawl breadth-first from the base URL.
+
+        Each depth level is fetched concurrently by the worker pool, with at
+        most 2 * max_workers fetches in flight; results are processed in
+        submission order so the crawl stays deterministic.
+        """
+        # Check exclude filter (before normalization to catch all variants)
+        if self._should_exclude_url(self.base_url):
+            self.stats['filtered_by_exclude'] += 1
+            logger.debug(f"Skipping {self.base_url} (matches exclude filter)")
+            return
+
+        # Check robots.txt compliance
+        if not self._can_fetch(self.base_url):
+            logger.info(f"Skipping {self.base_url} (disallowed by robots.txt)")
+            return
 
-            if normalized_for_visited not in self.visited_urls and not self.should_stop:
-                # Use original absolute_url for crawling (to preserve original URL structure)
-                # but normalized_for_visited is used for deduplication
-                self.crawl(absolute_url, current_depth + 1)
+        normalized_for_visited, normalized_for_sitemap = normalize_both(
+            self.base_url, strip_tracking=self.strip_tracking
+        )
+        self.visited_urls.add(self._url_key(normalized_for_visited))
+        level = [(self.base_url, normalized_for_sitemap)]
+        current_depth = 0
+
+        # Keep only a bounded window of fetches in flight, so a wide level does
+        # not queue thousands of futures (and their responses) at once
+        max_in_flight = 2 * self.max_workers
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while level and not self.should_stop:
+                level_urls = iter(level)
+                pending: Deque[Tuple[Tuple[str, str], Future]] = deque()
+                next_level: List[Tuple[str, str]] = []
+                while not self.should_stop:
+                    # Never have more fetches in flight than sitemap slots left, so
+                    # no page is downloaded past max_urls; a failed fetch frees its slot
+                    to_submit = max_in_flight - len(pending)
+                    if self.max_urls > 0:
+                        to_submit = min(to_submit, self.max_urls - len(self.sitemap) - len(pending))
+                    for entry in itertools.islice(level_urls, max(to_submit, 0)):
+                        pending.append((entry, executor.submit(self._fetch_and_parse, entry[0])))
+                    if not pending:
+                        break
+                    (url, normalized_for_sitemap), future = pending.popleft()
+                    try:
+                        hrefs = future.result()
+                    except Exception as e:
+                        # One broken page must not abort the rest of the crawl
+                        logger.error(f"Unexpected error processing {url}: {type(e).__name__}: {e}")
+                        with self._stats_lock:
+                            self.stats['fetch_errors'] += 1
+                        hrefs = None
+                    if self.progress_callback:
+                        self.progress_callback()
+                    # Stop if max_urls reached or the user cancelled
+                    if self.should_stop:
+                        break
+                    if hrefs is None:
+                        continue
+
+                    # Sitemap form was normalized with the visited form (preserves
+                    # trailing slash, removes tracking params if enabled)
+                    self.sitemap[normalized_for_sitemap] = None
+                    if self.url_callback:
+                        self.url_callback(normalized_for_sitemap)
+                    logger.debug(f"Crawled (depth {current_depth}): {normalized_for_sitemap}")
+
+                    # Stop as soon as the sitemap is full; its links are not needed
+                    if self.max_urls > 0 and len(self.sitemap) >= self.max_urls:
+                        self.should_stop = True
+                        self.stats['filtered_by_max_urls'] += 1
+                        logger.info(f"Reached max_urls limit ({self.max_urls}). Stopping crawl.")
+                        break
+
+                    next_level.extend(self._collect_links(url, hrefs, current_depth))
+
+                if self.should_stop:
+                    # Drop fetches that have not started yet
+                    for _, future in pending:
+                        future.cancel()
+                level = next_level
+                current_depth += 1
 
     def get_sitemap(self) -> List[str]:
         """Start the crawl and return the discovered sitemap.
 
         Clears any previous crawl state, performs the crawl starting
-        from the base URL, and returns a sorted list of discovered URLs.
+        from the base URL, and returns the discovered URLs. Exports sort
+        them; the crawl result itself is not sorted.
 
         Returns:
-            Sorted list of unique URLs discovered during the crawl.
+            List of unique URLs in the order they were discovered.
         """
         self.visited_urls.clear()
         self.sitemap.clear()
@@ -775,30 +1217,34 @@ class Crawler:
             'filtered_by_tracking': 0,
             'filtered_by_depth': 0,
             'filtered_by_max_urls': 0,
-            'non_200_status': 0
+            'filtered_by_content_type': 0,
+            'non_200_status': 0,
+            'fetch_errors': 0
         }
         logger.info(
             f"Starting crawl from {self.base_url} "
             f"(max_depth={self.max_depth}, max_urls={self.max_urls if self.max_urls > 0 else 'unlimited'}, "
             f"exclude_substrings={self.exclude_substrings}, strip_tracking={self.strip_tracking})"
         )
-        self.crawl(self.base_url, 0)
+        try:
+            self.crawl()
+        finally:
+            # Close session to free resources, even if the crawl failed
+            self.session.close()
         logger.info(f"Crawl completed. Found {len(self.sitemap)} URLs.")
-        # Close session to free resources
-        self.session.close()
-        return sorted(list(self.sitemap))
+        return list(self.sitemap)
 
 
 class CrawlerWorker(QThread):
     """Background worker thread for running crawls without blocking the GUI.
 
     Signals:
-        url_found_signal: Emitted when a URL is discovered (str).
+        url_found_signal: Emitted with batches of discovered URLs (list).
         finished_signal: Emitted when crawl completes with sitemap (list).
         error_signal: Emitted on unexpected errors (str).
     """
 
-    url_found_signal = pyqtSignal(str)
+    url_found_signal = pyqtSignal(list)
     finished_signal = pyqtSignal(list)
     error_signal = pyqtSignal(str)
 
@@ -810,7 +1256,8 @@ class CrawlerWorker(QThread):
         exclude_substrings: Optional[List[str]] = None,
         strip_tracking: bool = True,
         crawl_delay: float = DEFAULT_CRAWL_DELAY,
-        respect_robots_txt: bool = False
+        respect_robots_txt: bool = False,
+        max_workers: int = DEFAULT_MAX_WORKERS
     ) -> None:
         """Initialize the crawler worker thread.
 
@@ -822,6 +1269,7 @@ class CrawlerWorker(QThread):
             strip_tracking: Whether to strip tracking parameters (default: True).
             crawl_delay: Delay between requests in seconds (default: 0.5).
             respect_robots_txt: Whether to respect robots.txt (default: False).
+            max_workers: Number of pages fetched concurrently (default: 8).
         """
         super().__init__()
         self.start_url = start_url
@@ -831,6 +1279,10 @@ class CrawlerWorker(QThread):
         self.strip_tracking = strip_tracking
         self.crawl_delay = crawl_delay
         self.respect_robots_txt = respect_robots_txt
+        self.max_workers = max_workers
+        # URLs found since the last url_found_signal, flushed every URL_BATCH_INTERVAL
+        self._pending_urls: List[str] = []
+        self._last_flush_time = 0.0
         self.crawler = Crawler(
             self.start_url,
             self.max_depth,
@@ -838,19 +1290,50 @@ class CrawlerWorker(QThread):
             self.exclude_substrings,
             self.strip_tracking,
             self.crawl_delay,
-            self.respect_robots_txt
+            self.respect_robots_txt,
+            self.max_workers
         )
 
+    def _queue_url(self, url: str) -> None:
+        """Buffer a discovered URL and emit the buffer at most every URL_BATCH_INTERVAL.
+
+        Args:
+            url: Discovered URL.
+        """
+        self._pending_urls.append(url)
+        self._flush_urls_if_due()
+
+    def _flush_urls_if_due(self) -> None:
+        """Emit the buffered URLs if URL_BATCH_INTERVAL has passed since the last flush.
+
+        Also runs after every completed fetch, so URLs buffered before a run of
+        failed or filtered pages still reach the GUI without waiting for the
+        next discovered URL.
+        """
+        now = time.monotonic()
+        if self._pending_urls and now - self._last_flush_time >= URL_BATCH_INTERVAL:
+            self._flush_urls()
+            self._last_flush_time = now
+
+    def _flush_urls(self) -> None:
+        """Emit all buffered URLs in one url_found_signal."""
+        if self._pending_urls:
+            self.url_found_signal.emit(self._pending_urls)
+            self._pending_urls = []
+
     def run(self) -> None:
         """Execute the crawl in the background thread."""
         try:
-            self.crawler.url_callback = self.url_found_signal.emit
+            self.crawler.url_callback = self._queue_url
+            self.crawler.progress_callback = self._flush_urls_if_due
             sitemap = self.crawler.get_sitemap()
+            self._flush_urls()
             # Return both sitemap and stats
             self.finished_signal.emit(sitemap)
         except Exception as e:
             error_msg = f"Unexpected error during crawl: {type(e).__name__}: {str(e)}"
             logger.exception(f"Crawl failed: {error_msg}")
+            self._flush_urls()
             self.error_signal.emit(error_msg)
 
 
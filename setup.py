@@ -136,7 +136,7 @@ def build_executable():
             print("\nPyInstaller Output (stderr):\n", e.stderr)
         print("\nTroubleshooting tips:")
         print("1. Ensure PyInstaller is installed and up-to-date ('pip install --upgrade pyinstaller').")
-        print("2. Check that all dependencies of main.py (e.g., PyQt6, requests, beautifulsoup4) are installed in the environment.")
+        print("2. Check that all dependencies of main.py (e.g., PyQt6, requests, lxml) are installed in the environment.")
         print("3. If you have specific PyQt6 plugins or data files, you might need to use --add-data or --collect-all options.")
         print("4. Review the full output above for specific error messages from PyInstaller.")
         
@@ -1,79 +1,296 @@
 """Module for generating XML sitemaps and text URL lists.
 
 This module provides functions to convert lists of URLs into:
-- XML sitemap format (Google standard)
+- XML sitemap format (Google standard), optionally gzip-compressed
 - Plain text format (one URL per line)
 """
 
+import gzip
+import itertools
+import os
+import re
+import sys
 from datetime import datetime
-from typing import List
-from xml.etree.ElementTree import Element, tostring
-from xml.dom import minidom
+from typing import Iterator, List, TextIO, Tuple
+from urllib.parse import urljoin
+from xml.sax.saxutils import escape
 
+# Fixed parts of the sitemap document
+SITEMAP_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+SITEMAP_FOOTER = '</urlset>\n'
 
-def generate_sitemap_xml(urls: List[str]) -> str:
+# Sitemap protocol limits for one sitemap file: number of URLs and
+# uncompressed size in bytes (50 MB)
+MAX_URLS_PER_SITEMAP = 50_000
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+# Fixed parts of a sitemap index document
+SITEMAP_INDEX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+SITEMAP_INDEX_FOOTER = '</sitemapindex>\n'
+
+# Lines of one <url> entry; loc must already be XML-escaped. Only <loc> is
+# required by the protocol, and Google ignores <changefreq> and <priority>
+URL_ENTRY_OPEN = '  <url>\n    <loc>{loc}</loc>\n'
+LASTMOD_LINE = '    <lastmod>{lastmod}</lastmod>\n'
+CHANGEFREQ_LINE = '    <changefreq>weekly</changefreq>\n'  # Default value
+PRIORITY_LINE = '    <priority>0.8</priority>\n'  # Default value
+URL_ENTRY_CLOSE = '  </url>\n'
+
+
+def _ordered(urls: List[str], presorted: bool) -> List[str]:
+    """Return urls in output order: sorted with duplicates removed.
+    
+    Presorted input is used as-is, so it must already be free of duplicates.
+    """
+    return urls if presorted else sorted(set(urls))
+
+
+def _entry_template(include_lastmod: bool, include_changefreq: bool, include_priority: bool) -> str:
+    """Build the <url> entry template for a sitemap, leaving only {loc} to fill in.
+    
+    Everything but <loc> is the same for every entry, so it is formatted once
+    per sitemap instead of once per URL.
+    """
+    entry_template = URL_ENTRY_OPEN
+    if include_lastmod:
+        current_date = sys.intern(datetime.now().strftime('%Y-%m-%d'))
+        entry_template += LASTMOD_LINE.replace('{lastmod}', current_date)
+    if include_changefreq:
+        entry_template += CHANGEFREQ_LINE
+    if include_priority:
+        entry_template += PRIORITY_LINE
+    return entry_template + URL_ENTRY_CLOSE
+
+
+def _iter_sitemap(
+    urls: List[str],
+    presorted: bool = False,
+    include_lastmod: bool = True,
+    include_changefreq: bool = False,
+    include_priority: bool = False
+) -> Iterator[str]:
+    """Yield the XML sitemap for a list of URLs as consecutive string fragments.
+    
+    Args:
+        urls: List of URLs to include in the sitemap.
+        presorted: If True, urls is already sorted and deduplicated.
+        include_lastmod: If True, add <lastmod> with today's date to each entry.
+        include_changefreq: If True, add <changefreq> to each entry.
+        include_priority: If True, add <priority> to each entry.
+    
+    Yields:
+        The header, one fragment per <url> entry (sorted by URL), and the footer.
+    """
+    entry_template = _entry_template(include_lastmod, include_changefreq, include_priority)
+    
+    yield SITEMAP_HEADER
+    for url in _ordered(urls, presorted):
+        yield entry_template.format(loc=escape(url))
+    yield SITEMAP_FOOTER
+
+
+def generate_sitemap_xml(
+    urls: List[str],
+    presorted: bool = False,
+    *,
+    include_lastmod: bool = True,
+    include_changefreq: bool = False,
+    include_priority: bool = False
+) -> str:
     """Generate XML sitemap from a list of URLs.
     
     Creates a valid XML sitemap according to Google's sitemap protocol.
     Each URL entry includes <loc> and optionally <lastmod>, <changefreq>, <priority>.
+    Duplicate URLs produce a single entry.
     
     Args:
         urls: List of URLs to include in the sitemap.
+        presorted: If True, urls is already sorted and deduplicated.
+        include_lastmod: If True, add <lastmod> with today's date to each entry.
+        include_changefreq: If True, add <changefreq> to each entry.
+        include_priority: If True, add <priority> to each entry.
     
     Returns:
         String containing the XML sitemap.
     """
-    # Create root element with namespace
-    urlset = Element('urlset')
-    urlset.set('xmlns', 'http://www.sitemaps.org/schemas/sitemap/0.9')
+    return ''.join(_iter_sitemap(urls, presorted, include_lastmod, include_changefreq, include_priority))
+
+
+def _open_output(path: str) -> TextIO:
+    """Open path for writing UTF-8 text, gzip-compressed if it ends in .gz."""
+    if path.lower().endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+    return open(path, 'w', encoding='utf-8')
+
+
+def _split_parts(
+    urls: List[str],
+    entry_template: str,
+    max_urls: int,
+    max_bytes: int
+) -> Iterator[List[str]]:
+    """Format sitemap entries and group them into parts within both size limits.
+    
+    Args:
+        urls: Sorted, deduplicated URLs.
+        entry_template: Entry template from _entry_template().
+        max_urls: Maximum number of entries per part.
+        max_bytes: Maximum size of a part file in bytes (UTF-8, uncompressed),
+            including the sitemap header and footer.
+    
+    Yields:
+        Lists of formatted <url> entries, one list per part file.
+    """
+    overhead = len(SITEMAP_HEADER) + len(SITEMAP_FOOTER)
+    entries: List[str] = []
+    size = overhead
+    for url in urls:
+        entry = entry_template.format(loc=escape(url))
+        entry_size = len(entry) if entry.isascii() else len(entry.encode('utf-8'))
+        if entries and (len(entries) >= max_urls or size + entry_size > max_bytes):
+            yield entries
+            entries = []
+            size = overhead
+        entries.append(entry)
+        size += entry_size
+    yield entries
+
+
+def _part_name_parts(path: str) -> Tuple[str, str, str]:
+    """Split a sitemap path into (directory, stem, suffix) for naming part files.
+    
+    For '/out/sitemap.xml.gz' this is ('/out', 'sitemap', '.xml.gz').
+    """
+    directory, name = os.path.split(path)
+    compressed = name.lower().endswith('.gz')
+    stem, ext = os.path.splitext(name[:-3] if compressed else name)
+    return directory, stem, (ext + name[-3:] if compressed else ext)
+
+
+def find_sitemap_parts(path: str) -> List[str]:
+    """List existing part files that write_sitemap_files() would name after path.
+    
+    Args:
+        path: Path of the sitemap (or sitemap index) file.
+    
+    Returns:
+        Paths of existing files named like path's part files (sitemap-1.xml,
+        sitemap-2.xml, ...), in part order.
+    """
+    directory, stem, suffix = _part_name_parts(path)
+    pattern = re.compile(rf'{re.escape(stem)}-(\d+){re.escape(suffix)}')
+    try:
+        names = os.listdir(directory or '.')
+    except OSError:
+        return []
+    matches = [(int(match.group(1)), name) for name in names if (match := pattern.fullmatch(name))]
+    return [os.path.join(directory, name) for _, name in sorted(matches)]
+
+
+def write_sitemap_files(
+    urls: List[str],
+    path: str,
+    base_url: str,
+    max_urls: int = MAX_URLS_PER_SITEMAP,
+    presorted: bool = False,
+    *,
+    max_bytes: int = MAX_SITEMAP_BYTES,
+    include_lastmod: bool = True,
+    include_changefreq: bool = False,
+    include_priority: bool = False
+) -> List[str]:
+    """Write an XML sitemap, splitting it up with a sitemap index if it is too large.
+    
+    A list that fits in one file (at most max_urls URLs and max_bytes bytes)
+    is written to path as a single sitemap. Larger lists are written to
+    numbered part files next to path (sitemap-1.xml, sitemap-2.xml, ...),
+    and path becomes a sitemap index listing them. Existing files with those
+    names are overwritten; find_sitemap_parts() lists any left over from an
+    earlier, larger export. Files ending in .gz are gzip-compressed.
     
-    # Get current date for lastmod
+    Args:
+        urls: List of URLs to include in the sitemap.
+        path: Path of the sitemap (or sitemap index) file to create.
+        base_url: URL the files will be served from, used for the part
+            locations in the index (e.g. 'https://example.com/').
+        max_urls: Maximum number of URLs per sitemap file.
+        presorted: If True, urls is already sorted and deduplicated.
+        max_bytes: Maximum uncompressed size of a sitemap file in bytes.
+        include_lastmod: If True, add <lastmod> with today's date to each entry.
+        include_changefreq: If True, add <changefreq> to each entry.
+        include_priority: If True, add <priority> to each entry.
+    
+    Returns:
+        Paths of the files written, starting with path.
+    """
+    entry_template = _entry_template(include_lastmod, include_changefreq, include_priority)
+    parts = _split_parts(_ordered(urls, presorted), entry_template, max_urls, max_bytes)
+    first_part = next(parts)
+    second_part = next(parts, None)
+    if second_part is None:
+        with _open_output(path) as fp:
+            fp.write(SITEMAP_HEADER)
+            fp.writelines(first_part)
+            fp.write(SITEMAP_FOOTER)
+        return [path]
+    
+    directory, stem, suffix = _part_name_parts(path)
     current_date = datetime.now().strftime('%Y-%m-%d')
     
-    # Add each URL to the sitemap
-    for url in sorted(urls):
-        url_elem = Element('url')
-        
-        # Location (required)
-        loc = Element('loc')
-        loc.text = url
-        url_elem.append(loc)
-        
-        # Last modification date (optional, but recommended)
-        lastmod = Element('lastmod')
-        lastmod.text = current_date
-        url_elem.append(lastmod)
-        
-        # Change frequency (optional)
-        changefreq = Element('changefreq')
-        changefreq.text = 'weekly'  # Default value
-        url_elem.append(changefreq)
-        
-        # Priority (optional)
-        priority = Element('priority')
-        priority.text = '0.8'  # Default value
-        url_elem.append(priority)
-        
-        urlset.append(url_elem)
-    
-    # Convert to string with proper formatting
-    rough_string = tostring(urlset, encoding='unicode')
-    reparsed = minidom.parseString(rough_string)
-    
-    # Return pretty-printed XML
-    return reparsed.toprettyxml(indent='  ')
-
-
-def urls_to_text(urls: List[str]) -> str:
+    written = [path]
+    index_entries = []
+    for part, entries in enumerate(itertools.chain((first_part, second_part), parts), 1):
+        part_name = f'{stem}-{part}{suffix}'
+        part_path = os.path.join(directory, part_name)
+        with _open_output(part_path) as fp:
+            fp.write(SITEMAP_HEADER)
+            fp.writelines(entries)
+            fp.write(SITEMAP_FOOTER)
+        written.append(part_path)
+        index_entries.append(
+            '  <sitemap>\n'
+            f'    <loc>{escape(urljoin(base_url, part_name))}</loc>\n'
+            f'    <lastmod>{current_date}</lastmod>\n'
+            '  </sitemap>\n'
+        )
+    
+    with _open_output(path) as fp:
+        fp.write(SITEMAP_INDEX_HEADER)
+        fp.writelines(index_entries)
+        fp.write(SITEMAP_INDEX_FOOTER)
+    return written
+
+
+def urls_to_text(urls: List[str], presorted: bool = False) -> str:
     """Convert a list of URLs to a plain text format.
     
-    Each URL is placed on a separate line, sorted alphabetically.
+    Each URL is placed on a separate line, sorted alphabetically, with
+    duplicates removed.
     
     Args:
         urls: List of URLs to convert.
+        presorted: If True, urls is already sorted and deduplicated.
     
     Returns:
         String with one URL per line.
     """
-    return '\n'.join(sorted(urls))
+    return '\n'.join(_ordered(urls, presorted))
 
+
+def urls_to_text_stream(urls: List[str], fp: TextIO, presorted: bool = False) -> None:
+    """Write a list of URLs to an open text file, one per line, sorted alphabetically.
+    
+    Duplicate URLs are written once.
+    
+    Args:
+        urls: List of URLs to write.
+        fp: Text file opened for writing.
+        presorted: If True, urls is already sorted and deduplicated.
+    """
+    fp.writelines(f'{url}\n' for url in _ordered(urls, presorted))
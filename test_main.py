@@ -1,9 +1,12 @@
 """Unit tests for the ALX Sitemap Generator crawler functionality.
 
-Tests the Crawler class in isolation with mocked PyQt6 and HTTP requests.
+Tests the Crawler class in isolation with mocked PyQt6 and HTTP requests,
+and the sitemap export writers.
 """
 
 import sys
+import threading
+import time
 import unittest
 from unittest.mock import patch, Mock
 
@@ -42,10 +45,22 @@ mock_qtcore_module.pyqtSignal = mock_pyqtsignal
 # Add these mocks to sys.modules
 sys.modules['PyQt6.QtWidgets'] = mock_qtwidgets_module
 sys.modules['PyQt6.QtCore'] = mock_qtcore_module
+sys.modules['PyQt6.QtGui'] = Mock()
 # --- End of PyQt6 Mocks ---
 
+import main
 from main import Crawler # Now this import should work without PyQt6 installed
 import requests # For requests.exceptions.HTTPError
+import io
+import gzip
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from sitemap_generator import (
+    SITEMAP_FOOTER, SITEMAP_HEADER, find_sitemap_parts, generate_sitemap_xml, urls_to_text_stream,
+    write_sitemap_files
+)
+from url_normalizer import normalize_url
 from urllib.parse import urlparse # Added for domain checking in tests
 
 class TestCrawler(unittest.TestCase):
@@ -53,6 +68,8 @@ class TestCrawler(unittest.TestCase):
     def _create_mock_response(self, text, status_code=200, content_type='text/html', url=""):
         mock_resp = Mock()
         mock_resp.text = text
+        mock_resp.content = text.encode('utf-8')
+        mock_resp.iter_content = lambda chunk_size=1, decode_unicode=False: iter([mock_resp.content])
         mock_resp.status_code = status_code
         mock_resp.headers = {'Content-Type': content_type}
         mock_resp.url = url # Useful for debugging the mock
@@ -66,7 +83,7 @@ class TestCrawler(unittest.TestCase):
         mock_resp.raise_for_status = Mock(side_effect=raise_for_status)
         return mock_resp
 
-    @patch('main.requests.get')
+    @patch('main.requests.Session.get')
     def test_basic_crawl_single_page(self, mock_get):
         # Define what mock_get should return for specific URLs
         mock_responses = {
@@ -75,7 +92,7 @@ class TestCrawler(unittest.TestCase):
             "http://example.com/page2": self._create_mock_response('<html>No more links here.</html>', url="http://example.com/page2"),
             "http://example.com/page3": self._create_mock_response('<html>Final page.</html>', url="http://example.com/page3")
         }
-        mock_get.side_effect = lambda url, timeout=None, headers=None: mock_responses.get(url, self._create_mock_response("Not Found by Mock", 404, url=url))
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses.get(url, self._create_mock_response("Not Found by Mock", 404, url=url))
 
         crawler = Crawler("http://example.com", max_depth=2, crawl_delay=0)
         sitemap = crawler.get_sitemap()
@@ -89,7 +106,7 @@ class TestCrawler(unittest.TestCase):
         self.assertEqual(set(sitemap), expected_urls)
         # Check calls if necessary, e.g. mock_get.call_count
 
-    @patch('main.requests.get')
+    @patch('main.requests.Session.get')
     def test_same_domain_filter(self, mock_get):
         mock_responses = {
             "http://example.com": self._create_mock_response(
@@ -101,7 +118,7 @@ class TestCrawler(unittest.TestCase):
             "http://sub.example.com/pageS2": self._create_mock_response('<html>Subdomain Page S2 (should not be crawled)</html>', url="http://sub.example.com/pageS2"),
             "http://othersite.com/pageO": self._create_mock_response('<html>External Page O (should not be crawled)</html>', url="http://othersite.com/pageO")
         }
-        mock_get.side_effect = lambda url, timeout=None, headers=None: mock_responses.get(url, self._create_mock_response("Not Found by Mock", 404, url=url))
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses.get(url, self._create_mock_response("Not Found by Mock", 404, url=url))
 
         crawler = Crawler("http://example.com", max_depth=1, crawl_delay=0)
         sitemap = crawler.get_sitemap()
@@ -122,7 +139,7 @@ class TestCrawler(unittest.TestCase):
                              f"Crawler attempted to fetch a URL from an external domain: {actual_url_fetched}")
 
 
-    @patch('main.requests.get')
+    @patch('main.requests.Session.get')
     def test_depth_limit(self, mock_get):
         mock_responses = {
             "http://example.com": self._create_mock_response('<html><a href="/depth1">Depth 1</a></html>', url="http://example.com"),
@@ -130,7 +147,7 @@ class TestCrawler(unittest.TestCase):
             "http://example.com/depth2": self._create_mock_response('<html><a href="/depth3">Depth 3</a></html>', url="http://example.com/depth2"),
             "http://example.com/depth3": self._create_mock_response('<html>Depth 3 Content</html>', url="http://example.com/depth3")
         }
-        mock_get.side_effect = lambda url, timeout=None, headers=None: mock_responses.get(url, self._create_mock_response("Not Found by Mock", 404, url=url))
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses.get(url, self._create_mock_response("Not Found by Mock", 404, url=url))
 
         # Max depth 0: only base_url
         crawler0 = Crawler("http://example.com", max_depth=0, crawl_delay=0)
@@ -186,7 +203,7 @@ class TestCrawler(unittest.TestCase):
                          "Crawler with max_depth=2 should not have attempted to fetch URLs at depth 3.")
 
 
-    @patch('main.requests.get')
+    @patch('main.requests.Session.get')
     def test_url_normalization_and_visited_set(self, mock_get):
         mock_responses = {
             "http://example.com/page": self._create_mock_response(
@@ -198,7 +215,7 @@ class TestCrawler(unittest.TestCase):
         }
         # The crawler normalizes before adding to visited and before crawling,
         # so 'page#section' and 'page?param=1' become 'page'.
-        mock_get.side_effect = lambda url, timeout=None, headers=None: mock_responses.get(url, self._create_mock_response("Not Found by Mock for " + url, 404, url=url))
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses.get(url, self._create_mock_response("Not Found by Mock for " + url, 404, url=url))
         
         crawler = Crawler("http://example.com/page", max_depth=1, crawl_delay=0)
         sitemap = crawler.get_sitemap()
@@ -220,31 +237,23 @@ class TestCrawler(unittest.TestCase):
                 url="http://example.com/page?param=val"),
             "http://example.com/otherpage": self._create_mock_response('<html>Other page content</html>', url="http://example.com/otherpage")
         }
-        mock_get.side_effect = lambda url, timeout=None, headers=None: mock_responses_refined.get(url, self._create_mock_response("Not Found: " + url, 404, url=url))
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses_refined.get(url, self._create_mock_response("Not Found: " + url, 404, url=url))
 
         crawler_norm = Crawler("http://example.com/page", max_depth=1, crawl_delay=0)
         sitemap_norm = crawler_norm.get_sitemap()
         
         # URLs added to sitemap are the ones successfully crawled.
-        # Normalization for visited: http://example.com/page (from page, page#section1, page?param=val)
-        # If page?param=val is encountered, it's normalized to 'page' for visited check.
-        # If 'page' is already visited (e.g. base_url), then page?param=val won't be crawled.
-        # The current code:
-        #   absolute_url = urljoin(url, href) -> this has params/fragments
-        #   url_to_visit = parsed_absolute_url._replace(fragment="", query="").geturl() -> for visited_urls check
-        #   self.crawl(url_to_visit, ...) -> THIS IS THE PROBLEM. It should crawl `absolute_url` but check `url_to_visit` in visited.
-        # Let's assume the current crawler implementation is what we test.
-        # If base is "http://example.com/page", then:
-        # 1. Crawl "http://example.com/page". Add to visited. Add to sitemap.
-        # 2. Find "page#section1". abs="http://example.com/page#section1". url_to_visit="http://example.com/page". Already visited. Skip.
-        # 3. Find "page?param=val". abs="http://example.com/page?param=val". url_to_visit="http://example.com/page". Already visited. Skip.
-        # 4. Find "/otherpage". abs="http://example.com/otherpage". url_to_visit="http://example.com/otherpage". Not visited. Crawl. Add to sitemap.
+        # Normalization for visited drops fragments and tracking parameters only:
+        # 1. "http://example.com/page" is crawled and added to visited and the sitemap.
+        # 2. "page#section1" normalizes to "http://example.com/page". Already visited. Skip.
+        # 3. "page?param=val" keeps its query ('param' is not a tracking key), so it
+        #    is a distinct page. Crawled and added to the sitemap.
+        # 4. "/otherpage" is not visited. Crawled and added to the sitemap.
         
-        expected_urls_norm = {"http://example.com/page", "http://example.com/otherpage"}
+        expected_urls_norm = {"http://example.com/page", "http://example.com/page?param=val",
+                              "http://example.com/otherpage"}
         self.assertEqual(set(sitemap_norm), expected_urls_norm)
         
-        # Check that mock_get for "http://example.com/page?param=val" was NOT called
-        # because its normalized form "http://example.com/page" was already visited (as the base URL).
         
         # Get all unique URLs passed to mock_get by crawler_norm
         # Similar to test_depth_limit, reset mock if checking specific calls for crawler_norm
@@ -259,14 +268,8 @@ class TestCrawler(unittest.TestCase):
         self.assertIn("http://example.com/page", all_urls_requested_by_crawler_norm)
         self.assertIn("http://example.com/otherpage", all_urls_requested_by_crawler_norm)
         
-        # Key check: The normalized forms (which for "page?param=val" and "page#section1" is "page")
-        # should not lead to new fetches of "page?param=val" or "page#section1" if "page" was already fetched.
-        # The current crawler calls `self.crawl(url_to_visit, ...)` where url_to_visit is normalized.
-        # So, if base_url is "http://example.com/page", it's fetched.
-        # Then links like "page?param=val" are normalized to "http://example.com/page", which is already visited.
-        # Thus, "http://example.com/page?param=val" itself should not be passed to requests.get().
-        self.assertNotIn("http://example.com/page?param=val", all_urls_requested_by_crawler_norm,
-                         "URL with query param (e.g. http://example.com/page?param=val) should not be fetched if its normalized form was already visited.")
+        # Non-tracking query parameters identify a distinct page, so it is fetched once
+        self.assertIn("http://example.com/page?param=val", all_urls_requested_by_crawler_norm)
         # "http://example.com/page#section1" would be resolved by urljoin to "http://example.com/page" 
         # (if current page is http://example.com/page), and then normalized again to "http://example.com/page".
         # So it should not appear as a separate call.
@@ -274,17 +277,21 @@ class TestCrawler(unittest.TestCase):
                          "URL with fragment (e.g. http://example.com/page#section1) should not be fetched as a distinct URL if its base was visited.")
 
 
-    @patch('main.requests.get')
-    def test_content_type_filter(self, mock_get):
+    @patch('main.requests.Session.head')
+    @patch('main.requests.Session.get')
+    def test_content_type_filter(self, mock_get, mock_head):
         mock_responses = {
             "http://example.com": self._create_mock_response(
-                '<html><a href="/page.html">HTML Page</a><a href="/document.pdf">PDF Document</a><a href="/image.png">PNG Image</a></html>',
+                '<html><a href="/page.html">HTML Page</a><a href="/document.pdf">PDF Document</a>'
+                '<a href="/image.png">PNG Image</a><a href="/data.csv">CSV Data</a></html>',
                 url="http://example.com"),
             "http://example.com/page.html": self._create_mock_response('<html>HTML content</html>', url="http://example.com/page.html"),
             "http://example.com/document.pdf": self._create_mock_response('PDF binary data', content_type='application/pdf', url="http://example.com/document.pdf"),
-            "http://example.com/image.png": self._create_mock_response('PNG binary data', content_type='image/png', url="http://example.com/image.png")
+            "http://example.com/image.png": self._create_mock_response('PNG binary data', content_type='image/png', url="http://example.com/image.png"),
+            "http://example.com/data.csv": self._create_mock_response('a,b,c', content_type='text/csv', url="http://example.com/data.csv")
         }
-        mock_get.side_effect = lambda url, timeout=None, headers=None: mock_responses.get(url, self._create_mock_response("Not Found by Mock", 404, url=url))
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses.get(url, self._create_mock_response("Not Found by Mock", 404, url=url))
+        mock_head.side_effect = lambda url, allow_redirects=False, timeout=None: mock_responses.get(url, self._create_mock_response("Not Found by Mock", 404, url=url))
 
         crawler = Crawler("http://example.com", max_depth=1, crawl_delay=0)
         sitemap = crawler.get_sitemap()
@@ -292,14 +299,16 @@ class TestCrawler(unittest.TestCase):
         expected_urls = {"http://example.com", "http://example.com/page.html"}
         self.assertEqual(set(sitemap), expected_urls)
         
-        # Verify that requests.get was called for PDF/image (to check content type) but they are not in sitemap
-        pdf_url_requested = any(call_args[0][0] == "http://example.com/document.pdf" for call_args in mock_get.call_args_list)
-        png_url_requested = any(call_args[0][0] == "http://example.com/image.png" for call_args in mock_get.call_args_list)
-        self.assertTrue(pdf_url_requested, "Request for PDF URL was not made to check its content type")
-        self.assertTrue(png_url_requested, "Request for PNG URL was not made to check its content type")
+        # Known binary extensions are never requested; other non-HTML extensions
+        # are checked with HEAD and never downloaded
+        head_urls = {call_args[0][0] for call_args in mock_head.call_args_list}
+        get_urls = {call_args[0][0] for call_args in mock_get.call_args_list}
+        self.assertEqual(head_urls, {"http://example.com/data.csv"})
+        self.assertEqual(get_urls, {"http://example.com", "http://example.com/page.html"})
+        self.assertEqual(crawler.stats['filtered_by_content_type'], 3)
 
 
-    @patch('main.requests.get')
+    @patch('main.requests.Session.get')
     @patch('main.logger') # Patch logger instead of print
     def test_http_error_handling_for_single_url(self, mock_logger, mock_get):
         mock_responses = {
@@ -308,7 +317,7 @@ class TestCrawler(unittest.TestCase):
             "http://example.com/brokenpage": self._create_mock_response('Error', status_code=404, url="http://example.com/brokenpage"),
             "http://example.com/anothergood": self._create_mock_response('<html>More good content</html>', url="http://example.com/anothergood")
         }
-        mock_get.side_effect = lambda url, timeout=None, headers=None: mock_responses.get(url, self._create_mock_response("Default Mock 404", 404, url=url))
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses.get(url, self._create_mock_response("Default Mock 404", 404, url=url))
 
         crawler = Crawler("http://example.com", max_depth=1, crawl_delay=0)
         sitemap = crawler.get_sitemap()
@@ -326,7 +335,7 @@ class TestCrawler(unittest.TestCase):
         self.assertTrue(error_logged, "Error message for 404 page was not logged.")
 
 
-    @patch('main.requests.get')
+    @patch('main.requests.Session.get')
     def test_url_resolution_relative_and_absolute(self, mock_get):
         # Base URL: http://example.com/folder1/
         base_url = "http://example.com/folder1/"
@@ -347,7 +356,7 @@ class TestCrawler(unittest.TestCase):
             "http://example.com/page4.html": self._create_mock_response("Page 4", url="http://example.com/page4.html"),
             "https://othersite.com/page5.html": self._create_mock_response("Page 5 (External)", url="https://othersite.com/page5.html"),
         }
-        mock_get.side_effect = lambda url, timeout=None, headers=None: mock_responses.get(url, self._create_mock_response("Not Found by Mock: " + url, 404, url=url))
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses.get(url, self._create_mock_response("Not Found by Mock: " + url, 404, url=url))
 
         crawler = Crawler(base_url, max_depth=1, crawl_delay=0)
         sitemap = crawler.get_sitemap()
@@ -361,5 +370,317 @@ class TestCrawler(unittest.TestCase):
         }
         self.assertEqual(set(sitemap), expected_urls)
 
+    @patch('main.requests.Session.get')
+    def test_breadth_first_uses_shallowest_depth(self, mock_get):
+        # /b is linked from both the base page (depth 1) and /a (depth 2).
+        # Breadth-first order must record it at depth 1 so /c (depth 2) is still crawled.
+        mock_responses = {
+            "http://example.com": self._create_mock_response('<html><a href="/a">A</a><a href="/b">B</a></html>', url="http://example.com"),
+            "http://example.com/a": self._create_mock_response('<html><a href="/b">B</a></html>', url="http://example.com/a"),
+            "http://example.com/b": self._create_mock_response('<html><a href="/c">C</a></html>', url="http://example.com/b"),
+            "http://example.com/c": self._create_mock_response('<html>Leaf</html>', url="http://example.com/c")
+        }
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses.get(url, self._create_mock_response("Not Found by Mock", 404, url=url))
+
+        crawler = Crawler("http://example.com", max_depth=2, crawl_delay=0, max_workers=4)
+        sitemap = crawler.get_sitemap()
+
+        expected_urls = {
+            "http://example.com",
+            "http://example.com/a",
+            "http://example.com/b",
+            "http://example.com/c"
+        }
+        self.assertEqual(set(sitemap), expected_urls)
+
+    @patch('main.requests.Session.get')
+    def test_www_base_url_follows_same_site_links(self, mock_get):
+        # www. and bare host are the same site, whichever form the start URL uses
+        mock_responses = {
+            "http://www.example.com": self._create_mock_response('<html><a href="/a">A</a><a href="http://example.com/b">B</a></html>', url="http://www.example.com"),
+            "http://www.example.com/a": self._create_mock_response('<html>A</html>', url="http://www.example.com/a"),
+            "http://example.com/b": self._create_mock_response('<html>B</html>', url="http://example.com/b")
+        }
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses.get(url, self._create_mock_response("Not Found by Mock", 404, url=url))
+
+        crawler = Crawler("http://www.example.com", max_depth=1, crawl_delay=0)
+        sitemap = crawler.get_sitemap()
+
+        self.assertEqual(set(sitemap), {"http://www.example.com", "http://www.example.com/a", "http://example.com/b"})
+
+    @patch('main.requests.Session.get')
+    def test_robots_txt_rules_and_crawl_delay(self, mock_get):
+        robots = self._create_mock_response(
+            "User-agent: *\nDisallow: /private\nCrawl-delay: 2\n",
+            content_type='text/plain', url="http://example.com/robots.txt")
+        mock_get.return_value = robots
+
+        crawler = Crawler("http://example.com", crawl_delay=0.5, respect_robots_txt=True)
+
+        mock_get.assert_called_once_with("http://example.com/robots.txt", timeout=main.DEFAULT_TIMEOUT)
+        self.assertFalse(crawler._can_fetch("http://example.com/private/page"))
+        self.assertTrue(crawler._can_fetch("http://example.com/public"))
+        self.assertEqual(crawler.crawl_delay, 2.0)
+
+        # An excessive Crawl-delay is capped so the crawl and Stop stay responsive
+        mock_get.return_value = self._create_mock_response(
+            "User-agent: *\nCrawl-delay: 600\n", content_type='text/plain')
+        crawler = Crawler("http://example.com", crawl_delay=0.5, respect_robots_txt=True)
+        self.assertEqual(crawler.crawl_delay, main.MAX_CRAWL_DELAY)
+
+    @patch('main.requests.Session.get')
+    def test_max_urls_stops_fetching_at_the_limit(self, mock_get):
+        links = ''.join(f'<a href="/p{i}">P{i}</a>' for i in range(10))
+        base = self._create_mock_response(f'<html>{links}</html>', url="http://example.com")
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: (
+            base if url == "http://example.com" else self._create_mock_response('<html>Leaf</html>', url=url))
+
+        crawler = Crawler("http://example.com", max_depth=1, max_urls=3, crawl_delay=0, max_workers=4)
+        sitemap = crawler.get_sitemap()
+
+        self.assertEqual(len(sitemap), 3)
+        # Only the pages that fill the sitemap are downloaded
+        self.assertEqual(mock_get.call_count, 3)
+
+    def test_detect_encoding_prefers_header_charset(self):
+        cp1251_body = 'Привет, мир'.encode('cp1251')
+        self.assertEqual(Crawler._detect_encoding('text/html; charset=Windows-1251', cp1251_body), 'Windows-1251')
+
+        # Unknown header charset falls back to the <meta> charset, then utf-8
+        meta_body = b'<html><head><meta charset="koi8-r"></head></html>'
+        self.assertEqual(Crawler._detect_encoding('text/html; charset=bogus', meta_body), 'koi8-r')
+        self.assertEqual(Crawler._detect_encoding('text/html; charset=bogus', b'<html></html>'), 'utf-8')
+
+    @patch('main.requests.Session.get')
+    def test_fetch_with_non_utf8_charsets(self, mock_get):
+        crawler = Crawler("http://example.com", crawl_delay=0)
+        # euc-kr/euc-jp are named euc_kr/euc_jp by Python, which lxml rejects;
+        # latin-1 is known to Python but not to libxml2 at all
+        for charset in ('euc-kr', 'EUC-JP', 'latin-1'):
+            page = self._create_mock_response('', content_type=f'text/html; charset={charset}')
+            body = '<html><a href="/a">\uc548\ub155</a></html>' if charset == 'euc-kr' else '<html><a href="/a">A</a></html>'
+            page.iter_content = lambda chunk_size=1, decode_unicode=False, body=body, charset=charset: iter(
+                [body.encode(charset)])
+            mock_get.return_value = page
+            self.assertEqual(crawler._fetch_and_parse("http://example.com"), ['/a'], charset)
+
+    @patch('main.requests.Session.get')
+    def test_body_read_error_skips_page_and_crawl_continues(self, mock_get):
+        def broken_body(chunk_size=1, decode_unicode=False):
+            yield b'<html><a href="/lost">'
+            raise requests.exceptions.ConnectionError("Read timed out")
+
+        broken = self._create_mock_response('', url="http://example.com/page1")
+        broken.iter_content = broken_body
+        mock_responses = {
+            "http://example.com": self._create_mock_response('<html><a href="/page1">1</a><a href="/page2">2</a></html>'),
+            "http://example.com/page1": broken,
+            "http://example.com/page2": self._create_mock_response('<html>Two</html>'),
+        }
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses[url]
+
+        crawler = Crawler("http://example.com", max_depth=2, crawl_delay=0)
+        sitemap = crawler.get_sitemap()
+        self.assertEqual(sitemap, ["http://example.com", "http://example.com/page2"])
+        self.assertEqual(crawler.stats['fetch_errors'], 1)
+
+    @patch('main.requests.Session.get')
+    def test_hrefs_with_tabs_and_newlines_resolve_like_urljoin(self, mock_get):
+        mock_get.return_value = self._create_mock_response('<html></html>')
+
+        crawler = Crawler("http://example.com", crawl_delay=0)
+        links = crawler._collect_links(
+            "http://example.com/", ["/a\nb", "http://example.com/c\td", "/e\r\nf"], 0)
+        self.assertEqual([link for link, _ in links],
+                         ["http://example.com/ab", "http://example.com/cd", "http://example.com/ef"])
+
+    def test_long_retry_after_is_not_retried(self):
+        retry = Crawler("http://example.com", crawl_delay=0).session.get_adapter("http://example.com").max_retries
+        response = Mock()
+        response.status = 503
+        response.headers = {'Retry-After': '120'}
+        with self.assertRaises(main.MaxRetryError):
+            retry.increment(method='GET', url='/', response=response)
+        # A short wait is honored and retried; the policy survives urllib3's copies
+        response.headers = {'Retry-After': '1'}
+        retried = retry.increment(method='GET', url='/', response=response)
+        self.assertIsInstance(retried, type(retry))
+        self.assertEqual(retried.get_retry_after(response), 1)
+
+    def test_stop_interrupts_request_slot_wait(self):
+        crawler = Crawler("http://example.com", crawl_delay=30)
+        self.assertTrue(crawler._wait_for_request_slot("http://example.com/a"))
+
+        stopper = threading.Timer(0.1, crawler.stop)
+        stopper.start()
+        started = time.monotonic()
+        self.assertFalse(crawler._wait_for_request_slot("http://example.com/b"))
+        self.assertLess(time.monotonic() - started, 5)
+        stopper.join()
+
+    def test_rate_limit_key_groups_www_and_default_port(self):
+        key = Crawler._rate_limit_key
+        self.assertEqual(key("http://www.Example.com/a"), "example.com")
+        self.assertEqual(key("http://example.com:80/b"), "example.com")
+        self.assertEqual(key("https://www.example.com:443/"), "example.com")
+        self.assertEqual(key("http://example.com:8080/"), "example.com:8080")
+
+    @patch('main.requests.Session.head')
+    @patch('main.requests.Session.get')
+    def test_head_probe_takes_its_own_request_slot(self, mock_get, mock_head):
+        mock_get.return_value = self._create_mock_response('<html></html>')
+        mock_head.return_value = self._create_mock_response('', content_type='text/html')
+
+        crawler = Crawler("http://example.com", crawl_delay=0)
+        with patch.object(crawler, '_wait_for_request_slot') as wait:
+            crawler._fetch_and_parse("http://example.com/report.csv")
+            self.assertEqual(wait.call_count, 2)
+            wait.reset_mock()
+            crawler._fetch_and_parse("http://example.com/page")
+            self.assertEqual(wait.call_count, 1)
+
+    @patch('main.requests.Session.get')
+    def test_skipped_asset_counted_once_across_pages(self, mock_get):
+        template = '<a href="/logo.png">Logo</a><a href="/terms.pdf">Terms</a>'
+        mock_responses = {
+            "http://example.com": self._create_mock_response(f'<html>{template}<a href="/a">A</a><a href="/b">B</a></html>'),
+            "http://example.com/a": self._create_mock_response(f'<html>{template}</html>'),
+            "http://example.com/b": self._create_mock_response(f'<html>{template}</html>'),
+        }
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses[url]
+
+        crawler = Crawler("http://example.com", max_depth=2, crawl_delay=0)
+        crawler.get_sitemap()
+        self.assertEqual(crawler.stats['filtered_by_content_type'], 2)
+
+    @patch('main.requests.Session.get')
+    def test_malformed_link_does_not_abort_crawl(self, mock_get):
+        mock_responses = {
+            "http://example.com": self._create_mock_response(
+                '<html><a href="http://[oops/">Bad</a><a href="/ok">OK</a></html>'),
+            "http://example.com/ok": self._create_mock_response('<html>OK</html>'),
+        }
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses[url]
+
+        crawler = Crawler("http://example.com", max_depth=1, crawl_delay=0)
+        self.assertEqual(crawler.get_sitemap(), ["http://example.com", "http://example.com/ok"])
+
+    @patch('main.requests.Session.get')
+    def test_links_parsed_across_body_chunks(self, mock_get):
+        page = self._create_mock_response('', url="http://example.com")
+        page.iter_content = lambda chunk_size=1, decode_unicode=False: iter(
+            [b'<html><a hr', b'ef="/a">A</a><a href="/b', b'">B</a></html>'])
+        mock_get.return_value = page
+
+        crawler = Crawler("http://example.com", crawl_delay=0)
+        self.assertEqual(crawler._fetch_and_parse("http://example.com"), ['/a', '/b'])
+
+    @patch('main.requests.Session.get')
+    def test_progress_callback_runs_after_each_fetch(self, mock_get):
+        mock_responses = {
+            "http://example.com": self._create_mock_response(
+                '<html><a href="/ok">OK</a><a href="/missing">Missing</a></html>'),
+            "http://example.com/ok": self._create_mock_response('<html>OK</html>'),
+        }
+        mock_get.side_effect = lambda url, timeout=None, headers=None, stream=False: mock_responses.get(
+            url, self._create_mock_response("Not Found by Mock", 404, url=url))
+
+        crawler = Crawler("http://example.com", max_depth=1, crawl_delay=0)
+        progress_calls = []
+        crawler.progress_callback = lambda: progress_calls.append(len(crawler.sitemap))
+        crawler.get_sitemap()
+        # Three fetches, including the failed one for /missing
+        self.assertEqual(len(progress_calls), 3)
+
+class TestSitemapGenerator(unittest.TestCase):
+
+    def test_writers_sort_dedupe_and_escape(self):
+        urls = ["http://example.com/b?x=1&y=2", "http://example.com/a", "http://example.com/a"]
+
+        xml = generate_sitemap_xml(urls)
+        root = ET.fromstring(xml.encode('utf-8'))
+        ns = {'sm': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+        self.assertEqual([loc.text for loc in root.findall('sm:url/sm:loc', ns)], sorted(set(urls)))
+        self.assertEqual(generate_sitemap_xml(sorted(set(urls)), presorted=True), xml)
+
+        text_file = io.StringIO()
+        urls_to_text_stream(urls, text_file)
+        self.assertEqual(text_file.getvalue().splitlines(), sorted(set(urls)))
+
+    def test_optional_entry_fields(self):
+        default_xml = generate_sitemap_xml(["http://example.com/"])
+        self.assertIn("<lastmod>", default_xml)
+        self.assertNotIn("<changefreq>", default_xml)
+        self.assertNotIn("<priority>", default_xml)
+
+        full_xml = generate_sitemap_xml(["http://example.com/"], include_lastmod=False,
+                                        include_changefreq=True, include_priority=True)
+        self.assertNotIn("<lastmod>", full_xml)
+        self.assertIn("<changefreq>weekly</changefreq>", full_xml)
+        self.assertIn("<priority>0.8</priority>", full_xml)
+
+    def test_write_sitemap_files_gzip(self):
+        urls = ["http://example.com/b", "http://example.com/a"]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "sitemap.xml.gz")
+            self.assertEqual(write_sitemap_files(urls, path, "https://example.com/"), [path])
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                self.assertEqual(f.read(), generate_sitemap_xml(urls))
+
+    def test_write_sitemap_files_splits_with_index(self):
+        urls = [f"http://example.com/{i}" for i in range(5)]
+        ns = {'sm': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "sitemap.xml")
+            written = write_sitemap_files(urls, path, "https://example.com/", max_urls=2)
+            self.assertEqual([os.path.basename(p) for p in written],
+                             ["sitemap.xml", "sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml"])
+            index = ET.parse(path).getroot()
+            self.assertEqual([loc.text for loc in index.findall('sm:sitemap/sm:loc', ns)],
+                             [f"https://example.com/sitemap-{i}.xml" for i in (1, 2, 3)])
+            parts = [ET.parse(p).getroot() for p in written[1:]]
+            self.assertEqual([loc.text for part in parts for loc in part.findall('sm:url/sm:loc', ns)], urls)
+
+            self.assertEqual(write_sitemap_files(urls[:2], path, "https://example.com/", max_urls=2), [path])
+            self.assertEqual(ET.parse(path).getroot().tag, '{http://www.sitemaps.org/schemas/sitemap/0.9}urlset')
+
+    def test_write_sitemap_files_splits_by_size(self):
+        urls = [f"http://example.com/{i}/\u00e9" for i in range(5)]
+        entry_size = len(generate_sitemap_xml(urls[:1]).encode('utf-8')) - len(SITEMAP_HEADER + SITEMAP_FOOTER)
+        max_bytes = len(SITEMAP_HEADER + SITEMAP_FOOTER) + 2 * entry_size
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "sitemap.xml")
+            written = write_sitemap_files(urls, path, "https://example.com/", max_bytes=max_bytes)
+            self.assertEqual(len(written), 4)
+            for part_path in written[1:]:
+                self.assertLessEqual(os.path.getsize(part_path), max_bytes)
+
+            self.assertEqual(write_sitemap_files(urls[:2], path, "https://example.com/", max_bytes=max_bytes), [path])
+
+    def test_find_sitemap_parts_lists_stale_parts(self):
+        urls = [f"http://example.com/{i}" for i in range(5)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "sitemap.xml.gz")
+            write_sitemap_files(urls, path, "https://example.com/", max_urls=1)
+            written = write_sitemap_files(urls, path, "https://example.com/", max_urls=2)
+            self.assertEqual(find_sitemap_parts(path),
+                             [os.path.join(tmp_dir, f"sitemap-{i}.xml.gz") for i in range(1, 6)])
+            stale = [p for p in find_sitemap_parts(path) if p not in written]
+            self.assertEqual([os.path.basename(p) for p in stale], ["sitemap-4.xml.gz", "sitemap-5.xml.gz"])
+
+class TestUrlNormalizer(unittest.TestCase):
+
+    def test_tracking_params_removed_keeping_raw_query(self):
+        self.assertEqual(
+            normalize_url("HTTP://Example.com/x?b=2&utm_source=nl&a=%20+&page=3&ref=1#top"),
+            "http://example.com/x?b=2&a=%20+&page=3")
+        self.assertEqual(normalize_url("http://example.com/x?gclid=1&fbclid=2"), "http://example.com/x")
+
+    def test_trailing_slash_removal_strips_one_slash(self):
+        self.assertEqual(normalize_url("http://example.com/a/", preserve_trailing_slash=False), "http://example.com/a")
+        self.assertEqual(normalize_url("http://example.com/a//", preserve_trailing_slash=False), "http://example.com/a/")
+        self.assertEqual(normalize_url("http://example.com/", preserve_trailing_slash=False), "http://example.com/")
+        self.assertEqual(normalize_url("http://example.com/a/"), "http://example.com/a/")
+
 if __name__ == '__main__':
     unittest.main()
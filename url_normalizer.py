@@ -8,93 +8,155 @@ This module provides functions to normalize URLs according to SEO best practices
 - Preserving trailing slashes for CMS compatibility
 """
 
-from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
-from typing import Optional
+from functools import lru_cache
+from urllib.parse import ParseResult, urlparse, urlunparse
+from typing import Optional, Tuple, Union
+
+
+# Normalized URLs remembered; sites repeat the same links on every page
+NORMALIZE_CACHE_SIZE = 200_000
 
 
 # Common tracking parameters to remove
-TRACKING_PARAMS = {
+TRACKING_PARAMS = frozenset({
     'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
     'gclid', 'yclid', 'fbclid', '_openstat', 'ref', 'source', 'medium',
     'campaign', 'term', 'content', 'mc_cid', 'mc_eid', '_ga', '_gid'
-}
+})
 
 # Pagination parameters that should be preserved (not treated as tracking)
 # These are common pagination parameter names used by various CMS and frameworks
-PAGINATION_PARAMS = {
+PAGINATION_PARAMS = frozenset({
     'page', 'p', 'pagenum', 'pagenumber', 'pageno', 'offset', 'start',
     'per_page', 'limit', 'from', 'to', 'num', 'n', 'pg'
-}
+})
+
+
+def _filter_query(query: str) -> str:
+    """Remove tracking parameters from a raw query string.
+    
+    Works on the raw key=value pairs, so the remaining parameters keep their
+    original order and percent-encoding.
+    
+    Args:
+        query: Query string without the leading '?'.
+    
+    Returns:
+        Query string with tracking parameters and empty pairs removed.
+    """
+    kept = []
+    for pair in query.split('&'):
+        if not pair:
+            continue
+        key_lower = pair.split('=', 1)[0].lower()
+        # Preserve pagination parameters; remove tracking parameters and utm_*
+        if key_lower in PAGINATION_PARAMS or not (
+                key_lower in TRACKING_PARAMS or key_lower.startswith('utm_')):
+            kept.append(pair)
+    return '&'.join(kept)
+
+
+def _fast_split(url: str) -> Optional[Tuple[str, str, str, str]]:
+    """Split a plain http(s) URL into (scheme, netloc, path, query) with str.find.
+    
+    The fragment is dropped. Returns None for anything that needs the full
+    urlparse() treatment: other schemes, ;params, or characters urlparse strips.
+    """
+    head = url[:8].lower()
+    if head == 'https://':
+        scheme, start = 'https', 8
+    elif head.startswith('http://'):
+        scheme, start = 'http', 7
+    else:
+        return None
+    if ';' in url or '\t' in url or '\r' in url or '\n' in url or url[-1] <= ' ':
+        return None
+    
+    hash_pos = url.find('#')
+    if hash_pos >= 0:
+        url = url[:hash_pos]
+    query = ''
+    query_pos = url.find('?')
+    if query_pos >= 0:
+        query = url[query_pos + 1:]
+        url = url[:query_pos]
+    path_pos = url.find('/', start)
+    if path_pos < 0:
+        return scheme, url[start:], '', query
+    return scheme, url[start:path_pos], url[path_pos:], query
 
 
 def normalize_url(
-    url: str,
+    url: Union[str, ParseResult],
     strip_tracking: bool = True,
     remove_www: bool = False,
     preserve_trailing_slash: bool = True
 ) -> str:
     """Normalize a URL according to specified rules.
     
+    Results are memoized, so repeated URLs are only parsed and rebuilt once.
+    
     Args:
-        url: URL to normalize.
+        url: URL to normalize, or the result of urlparse() on it if the caller
+            has already parsed it.
         strip_tracking: If True, remove tracking parameters from query string.
         remove_www: If True, remove www. prefix from host.
-        preserve_trailing_slash: If True, preserve trailing slash in path.
+        preserve_trailing_slash: If True, preserve trailing slash in path;
+            otherwise a single trailing slash is removed.
     
     Returns:
         Normalized URL string.
     """
-    if not url:
+    # Pass the flags positionally so every call shape shares one cache entry
+    return _normalize_cached(url, strip_tracking, remove_www, preserve_trailing_slash)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_cached(
+    url: Union[str, ParseResult],
+    strip_tracking: bool,
+    remove_www: bool,
+    preserve_trailing_slash: bool
+) -> str:
+    """Memoized implementation of normalize_url()."""
+    # Unpack the URL parts into locals once; the fragment is always dropped
+    if isinstance(url, ParseResult):
+        scheme, netloc, path, params, query, _ = url
+    elif not url:
         return url
-    
-    # Parse URL
-    parsed = urlparse(url)
+    else:
+        split = _fast_split(url)
+        if split is not None:
+            scheme, netloc, path, query = split
+            params = ''
+        else:
+            scheme, netloc, path, params, query, _ = urlparse(url)
     
     # Normalize scheme to lowercase
-    scheme = parsed.scheme.lower() if parsed.scheme else ''
+    scheme = scheme.lower()
     
     # Normalize host to lowercase
-    netloc = parsed.netloc.lower() if parsed.netloc else ''
+    netloc = netloc.lower()
     
     # Optionally remove www. prefix
     if remove_www and netloc.startswith('www.'):
         netloc = netloc[4:]
     
-    # Normalize path (preserve trailing slash if needed)
-    path = parsed.path
-    if not preserve_trailing_slash and path.endswith('/') and len(path) > 1:
-        path = path.rstrip('/')
+    # Normalize path: drop a single trailing slash unless asked to preserve it
+    if not preserve_trailing_slash and len(path) > 1 and path[-1] == '/':
+        path = path[:-1]
     
     # Process query string - remove tracking parameters
-    query = parsed.query
     if strip_tracking and query:
-        query_params = parse_qs(query, keep_blank_values=True)
-        
-        # Remove tracking parameters (but preserve pagination parameters)
-        filtered_params = {}
-        for key, values in query_params.items():
-            key_lower = key.lower()
-            # Preserve pagination parameters
-            if key_lower in PAGINATION_PARAMS:
-                filtered_params[key] = values
-            # Remove if it's a tracking parameter or starts with utm_
-            elif not (key_lower in TRACKING_PARAMS or key_lower.startswith('utm_')):
-                filtered_params[key] = values
-        
-        # Rebuild query string
-        if filtered_params:
-            # Reconstruct query string preserving original parameter order where possible
-            query = urlencode(filtered_params, doseq=True)
-        else:
-            query = ''
-    
-    # Fragment is always removed (everything after #)
-    fragment = ''
-    
-    # Reconstruct normalized URL
-    normalized = urlunparse((scheme, netloc, path, parsed.params, query, fragment))
-    
-    return normalized
+        query = _filter_query(query)
+    
+    # Reconstruct normalized URL; the fragment is always removed. The common
+    # scheme://host/path?query shape is joined directly, the rest by urlunparse
+    if scheme and netloc and not params:
+        if query:
+            return f'{scheme}://{netloc}{path}?{query}'
+        return f'{scheme}://{netloc}{path}'
+    return urlunparse((scheme, netloc, path, params, query, ''))
 
 
 def normalize_for_visited(url: str, strip_tracking: bool = True, remove_www: bool = False) -> str:
@@ -111,7 +173,7 @@ def normalize_for_visited(url: str, strip_tracking: bool = True, remove_www: boo
     Returns:
         Normalized URL for deduplication.
     """
-    return normalize_url(url, strip_tracking=strip_tracking, remove_www=remove_www, preserve_trailing_slash=True)
+    return _normalize_cached(url, strip_tracking, remove_www, True)
 
 
 def normalize_for_sitemap(url: str, strip_tracking: bool = True, remove_www: bool = False) -> str:
@@ -128,5 +190,27 @@ def normalize_for_sitemap(url: str, strip_tracking: bool = True, remove_www: boo
     Returns:
         Normalized URL for sitemap.
     """
-    return normalize_url(url, strip_tracking=strip_tracking, remove_www=remove_www, preserve_trailing_slash=True)
+    return _normalize_cached(url, strip_tracking, remove_www, True)
 
+
+def normalize_both(
+    url: Union[str, ParseResult],
+    strip_tracking: bool = True,
+    remove_www: bool = False
+) -> Tuple[str, str]:
+    """Normalize URL for both the visited set and the sitemap in one pass.
+    
+    Equivalent to calling normalize_for_visited() and normalize_for_sitemap(),
+    but parses and filters the URL only once.
+    
+    Args:
+        url: URL to normalize, or its urlparse() result to skip parsing.
+        strip_tracking: If True, remove tracking parameters.
+        remove_www: If True, remove www. prefix.
+    
+    Returns:
+        Tuple of (normalized URL for deduplication, normalized URL for sitemap).
+    """
+    # Both forms currently use the same rules, so one normalization serves both
+    normalized = _normalize_cached(url, strip_tracking, remove_www, True)
+    return normalized, normalized